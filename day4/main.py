@@ -4,9 +4,11 @@ Camp Cleanup
 https://adventofcode.com/2022/day/4
 """
 
-from collections.abc import Callable
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from itertools import pairwise
 from os import path
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 INPUT_FILE = "input.txt"
 TEST_FILE = "test.txt"
@@ -26,6 +28,139 @@ class AssignmentPair(NamedTuple):
     camper2_assignment: Assignment
 
 
+class CoverageSegment(NamedTuple):
+    """Represents a run of sections covered by the same number of assignments."""
+
+    start_section: int
+    end_section: int
+    assignment_count: int
+
+
+class AssignmentIndex:
+    """Represents an index of many cleanup assignments for fleet-wide queries.
+
+    The assignments are sorted by their start sections once, and their endpoints are
+    swept in order to find how many assignments cover each run of sections.
+    """
+
+    def __init__(self, assignments: Iterable[Assignment]) -> None:
+        """Create a new index of the given assignments."""
+
+        self.assignments = list(assignments)
+        self.order = sorted(
+            range(len(self.assignments)),
+            key=lambda index: self.assignments[index],
+        )
+        self.coverage = self._sweep_coverage()
+
+    def _sweep_coverage(self) -> list[CoverageSegment]:
+        """Find how many assignments cover each run of sections between them."""
+
+        # NOTE: Each assignment adds one to the count at its start section and
+        # removes one just past its end section. Sweeping the sorted sections gives
+        # the count between each section and the next.
+
+        changes: defaultdict[int, int] = defaultdict(int)
+        for start_section, end_section in self.assignments:
+            changes[start_section] += 1
+            changes[end_section + 1] -= 1
+
+        coverage = []
+        assignment_count = 0
+        sections = sorted(changes)
+        for section, next_section in pairwise(sections):
+            assignment_count += changes[section]
+            coverage.append(
+                CoverageSegment(section, next_section - 1, assignment_count)
+            )
+
+        return coverage
+
+    def overlapping_assignments(self) -> list[Assignment]:
+        """Find the assignments that overlap at least one other assignment."""
+
+        # NOTE: In order of start section, an assignment overlaps another if an
+        # earlier one ends at or after its start, or if the next one starts at or
+        # before its end. Any later overlapping assignment would start no earlier
+        # than the next one, so checking the next one is enough.
+
+        overlapping = [False] * len(self.assignments)
+        latest_end_section = None
+
+        for position, index in enumerate(self.order):
+            start_section, end_section = self.assignments[index]
+
+            if latest_end_section is not None and latest_end_section >= start_section:
+                overlapping[index] = True
+
+            if position + 1 < len(self.order):
+                next_start_section = self.assignments[self.order[position + 1]][0]
+                if next_start_section <= end_section:
+                    overlapping[index] = True
+
+            if latest_end_section is None or end_section > latest_end_section:
+                latest_end_section = end_section
+
+        return [
+            assignment
+            for assignment, is_overlapping in zip(self.assignments, overlapping)
+            if is_overlapping
+        ]
+
+    def max_coverage(self) -> int:
+        """Find the largest number of assignments that cover the same section."""
+
+        return max(
+            (segment.assignment_count for segment in self.coverage),
+            default=0,
+        )
+
+    def uncovered_sections(
+        self,
+        first_section: Optional[int] = None,
+        last_section: Optional[int] = None,
+    ) -> list[CoverageSegment]:
+        """Find the runs of sections within the given bounds that nobody covers.
+
+        By default, the bounds are the first and last sections of any assignment.
+        """
+
+        if self.coverage:
+            if first_section is None:
+                first_section = self.coverage[0].start_section
+            if last_section is None:
+                last_section = self.coverage[-1].end_section
+        elif first_section is None or last_section is None:
+            return []
+
+        if first_section > last_section:
+            raise ValueError(f"Invalid section bounds: {first_section}-{last_section}")
+
+        if not self.coverage:
+            return [CoverageSegment(first_section, last_section, 0)]
+
+        uncovered = []
+
+        if first_section < self.coverage[0].start_section:
+            end_section = min(last_section, self.coverage[0].start_section - 1)
+            uncovered.append(CoverageSegment(first_section, end_section, 0))
+
+        for segment in self.coverage:
+            if segment.assignment_count:
+                continue
+
+            start_section = max(first_section, segment.start_section)
+            end_section = min(last_section, segment.end_section)
+            if start_section <= end_section:
+                uncovered.append(CoverageSegment(start_section, end_section, 0))
+
+        if last_section > self.coverage[-1].end_section:
+            start_section = max(first_section, self.coverage[-1].end_section + 1)
+            uncovered.append(CoverageSegment(start_section, last_section, 0))
+
+        return uncovered
+
+
 def read_assignment_pairs(file_name: str) -> list[AssignmentPair]:
     """Read the assignment pairs from the given file."""
 
@@ -71,6 +206,14 @@ def assignments_have_partial_overlap(assignment_pair: AssignmentPair) -> bool:
     return assignment1_overlaps_2 or assignment2_overlaps_1
 
 
+def flatten_assignment_pairs(
+    assignment_pairs: list[AssignmentPair],
+) -> list[Assignment]:
+    """Gather the assignments of every camper from a list of assignment pairs."""
+
+    return [assignment for pair in assignment_pairs for assignment in pair]
+
+
 def count_assignment_pairs_satisfying_condition(
     assignment_pairs: list[AssignmentPair],
     condition: Callable[[AssignmentPair], bool],
@@ -100,6 +243,24 @@ def main() -> None:
     )
     print(f"The number of partial overlaps is {partial_overlap_count}")
 
+    assignment_index = AssignmentIndex(flatten_assignment_pairs(assignment_pairs))
+
+    overlapping_assignments = assignment_index.overlapping_assignments()
+    print(
+        "The number of assignments overlapping any other is",
+        len(overlapping_assignments),
+    )
+
+    max_coverage = assignment_index.max_coverage()
+    print(f"The most assignments covering a single section is {max_coverage}")
+
+    uncovered_sections = assignment_index.uncovered_sections()
+    uncovered_section_count = sum(
+        segment.end_section - segment.start_section + 1
+        for segment in uncovered_sections
+    )
+    print(f"The number of sections nobody covers is {uncovered_section_count}")
+
 
 if __name__ == "__main__":
     main()
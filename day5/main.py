@@ -4,15 +4,33 @@ Supply Stacks
 https://adventofcode.com/2022/day/5
 """
 
-import re
+import gc
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from itertools import accumulate, islice, pairwise
+from mmap import ACCESS_READ, mmap
 from os import path
-from typing import Callable, NamedTuple
+from random import random
+from shutil import copyfileobj
+from tempfile import TemporaryFile
+from types import TracebackType
+from typing import Callable, NamedTuple, Optional
 
 INPUT_FILE = "input.txt"
 TEST_FILE = "test.txt"
 
+CHECKPOINT_INTERVAL = 1024
+COMPILED_PROCEDURE_MAGIC = b"AOC5PROC"
+COMPILED_PROCEDURE_VERSION = 1
 
-MOVE_REGEX = re.compile(r"move (\d+) from (\d+) to (\d+)")
+# NOTE: The header holds the magic bytes, the format version, the number of stacks,
+# the number of moves, the number of moves between checkpoints, the number of
+# checkpoints, and whether the checkpoints were taken moving crates as a group.
+
+COMPILED_PROCEDURE_HEADER = struct.Struct("<8sIIQQII")
 
 
 class Move(NamedTuple):
@@ -24,6 +42,7 @@ class Move(NamedTuple):
 
 
 SupplyStack = list[str]
+MoveCrates = Callable[[list[SupplyStack], Move], list[SupplyStack]]
 
 
 class Parameters(NamedTuple):
@@ -40,7 +59,14 @@ def read_operation_parameters(file_path: str) -> Parameters:
     """Read the initial supply stacks and the rearrangement procedure from a file."""
 
     with open(file_path, encoding="utf-8") as file:
-        lines = iter(file.readlines())
+        initial_stacks = read_initial_stacks(file)
+        rearrangement_procedure = list(read_rearrangement_procedure(file))
+
+    return Parameters(initial_stacks, rearrangement_procedure)
+
+
+def read_initial_stacks(lines: Iterator[str]) -> list[SupplyStack]:
+    """Read the initial supply stacks from lines of text up to the first blank line."""
 
     # NOTE: The spacing is important for the lines related to the initial stacks
     # but not for the lines related to the rearrangement procedure. That's why we
@@ -50,10 +76,34 @@ def read_operation_parameters(file_path: str) -> Parameters:
     while (line := next(lines)) != "\n":
         stacks_lines.append(line)
 
-    initial_stacks = parse_initial_stacks(stacks_lines)
-    rearrangement_procedure = [parse_move(line.strip()) for line in lines]
+    return parse_initial_stacks(stacks_lines)
 
-    return Parameters(initial_stacks, rearrangement_procedure)
+
+def read_rearrangement_procedure(lines: Iterable[str]) -> Iterator[Move]:
+    """Read the moves of the rearrangement procedure from lines of text lazily."""
+
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield parse_move(line)
+
+
+def execute_rearrangements_from_file(
+    file_path: str,
+    move_crates_functions: Sequence[MoveCrates],
+) -> list[list[SupplyStack]]:
+    """Execute the rearrangement procedure in a file as its moves are read.
+
+    Only the supply stacks are held in memory, never the procedure as a whole.
+    """
+
+    with open(file_path, encoding="utf-8") as file:
+        initial_stacks = read_initial_stacks(file)
+        return execute_rearrangements(
+            initial_stacks,
+            read_rearrangement_procedure(file),
+            move_crates_functions,
+        )
 
 
 def parse_initial_stacks(lines: list[str]) -> list[SupplyStack]:
@@ -79,11 +129,22 @@ def parse_initial_stacks(lines: list[str]) -> list[SupplyStack]:
 def parse_move(line: str) -> Move:
     """Parse a move from a line of text."""
 
-    match = MOVE_REGEX.match(line)
-    if not match:
+    # NOTE: Moves are always of the form "move N from X to Y", so splitting on
+    # whitespace and checking the keywords is enough, and much faster than a regex.
+
+    segments = line.split()
+    if (
+        len(segments) != 6
+        or segments[0] != "move"
+        or segments[2] != "from"
+        or segments[4] != "to"
+    ):
         raise ValueError(f"Invalid move: {line}")
 
-    amount, source, destination = map(int, match.groups())
+    try:
+        amount, source, destination = map(int, segments[1::2])
+    except ValueError:
+        raise ValueError(f"Invalid move: {line}") from None
 
     return Move(amount, source, destination)
 
@@ -91,7 +152,7 @@ def parse_move(line: str) -> Move:
 def execute_rearrangement(
     initial_stacks: list[SupplyStack],
     rearrangement_procedure: list[Move],
-    move_crates: Callable[[list[SupplyStack], Move], list[SupplyStack]],
+    move_crates: MoveCrates,
 ) -> list[SupplyStack]:
     """Execute the rearrangement procedure on the initial supply stacks."""
 
@@ -103,6 +164,29 @@ def execute_rearrangement(
     return stacks
 
 
+def execute_rearrangements(
+    initial_stacks: list[SupplyStack],
+    rearrangement_procedure: Iterable[Move],
+    move_crates_functions: Sequence[MoveCrates],
+) -> list[list[SupplyStack]]:
+    """Execute the rearrangement procedure once for several ways of moving crates.
+
+    Each way of moving crates works on its own copy of the initial supply stacks,
+    but the procedure is only walked once for all of them.
+    """
+
+    stacks_per_function = [
+        [stack.copy() for stack in initial_stacks] for _ in move_crates_functions
+    ]
+    simulations = list(zip(move_crates_functions, stacks_per_function))
+
+    for move in rearrangement_procedure:
+        for move_crates, stacks in simulations:
+            move_crates(stacks, move)
+
+    return stacks_per_function
+
+
 def move_crates_one_by_one(stacks: list[SupplyStack], move: Move) -> list[SupplyStack]:
     """Move crates between stacks one by one."""
 
@@ -137,6 +221,588 @@ def move_crates_as_group(stacks: list[SupplyStack], move: Move) -> list[SupplySt
     return stacks
 
 
+class RopeNode:
+    """Represents a crate in a rope, along with the crates beneath it in the tree."""
+
+    __slots__ = ("crate", "priority", "size", "is_reversed", "left", "right")
+
+    def __init__(self, crate: str) -> None:
+        """Create a new rope node holding a single crate."""
+
+        self.crate = crate
+        self.priority = random()
+        self.size = 1
+        self.is_reversed = False
+        self.left: Optional[RopeNode] = None
+        self.right: Optional[RopeNode] = None
+
+    def copy(self) -> "RopeNode":
+        """Create a copy of the node that shares its children."""
+
+        node = RopeNode(self.crate)
+        node.priority = self.priority
+        node.size = self.size
+        node.is_reversed = self.is_reversed
+        node.left = self.left
+        node.right = self.right
+        return node
+
+
+class CrateRope:
+    """Represents a supply stack as a rope of crates, ordered from bottom to top.
+
+    The rope is a randomized balanced tree, so any number of crates can be split off
+    the top, reversed, or joined onto another rope in logarithmic time.
+    """
+
+    def __init__(self, crates: Iterable[str] = ()) -> None:
+        """Create a new rope holding the given crates, ordered from bottom to top."""
+
+        self.root = build_rope(crates)
+
+    def __len__(self) -> int:
+        """Count the crates in the rope."""
+
+        return rope_size(self.root)
+
+    def __getitem__(self, index: int) -> str:
+        """Get the crate at the given position in the rope."""
+
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("Rope index out of range")
+
+        node = self.root
+        while True:
+            push_down_reversal(node)
+            left_size = rope_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.crate
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the crates in the rope from bottom to top."""
+
+        pending_nodes = []
+        node = self.root
+        while pending_nodes or node:
+            while node:
+                push_down_reversal(node)
+                pending_nodes.append(node)
+                node = node.left
+
+            node = pending_nodes.pop()
+            yield node.crate
+            node = node.right
+
+    def copy(self) -> "CrateRope":
+        """Create a copy of the rope."""
+
+        rope = CrateRope()
+        rope.root = copy_rope(self.root)
+        return rope
+
+    def take_from_top(self, amount: int) -> "CrateRope":
+        """Remove the given number of crates from the top of the rope."""
+
+        size = len(self)
+        if not 0 <= amount <= size:
+            raise IndexError(f"Cannot take {amount} crates from a rope of {size}")
+
+        self.root, top = split_rope(self.root, len(self) - amount)
+
+        taken = CrateRope()
+        taken.root = top
+        return taken
+
+    def put_on_top(self, rope: "CrateRope") -> None:
+        """Place the crates of another rope on top of this one, emptying the other."""
+
+        self.root = merge_ropes(self.root, rope.root)
+        rope.root = None
+
+    def reverse(self) -> None:
+        """Reverse the order of the crates in the rope."""
+
+        if self.root:
+            self.root.is_reversed = not self.root.is_reversed
+
+
+def rope_size(node: Optional[RopeNode]) -> int:
+    """Count the crates in the rope rooted at the given node."""
+
+    return node.size if node else 0
+
+
+@contextmanager
+def pause_garbage_collection() -> Iterator[None]:
+    """Pause the cyclic garbage collector for the duration of a block."""
+
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def build_rope(crates: Iterable[str]) -> Optional[RopeNode]:
+    """Build a rope holding the given crates, ordered from bottom to top."""
+
+    # NOTE: The crates arrive in order, so the tree is built in linear time by
+    # keeping its right spine on a stack. A new node takes the nodes of lower
+    # priority off the top of the spine as its left subtree, and each node popped
+    # off the spine is complete, so its size is known at that point.
+
+    spine: list[RopeNode] = []
+    for crate in crates:
+        node = RopeNode(crate)
+
+        while spine and spine[-1].priority < node.priority:
+            child = spine.pop()
+            child.size = rope_size(child.left) + rope_size(child.right) + 1
+            node.left = child
+
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+
+    root = None
+    while spine:
+        root = spine.pop()
+        root.size = rope_size(root.left) + rope_size(root.right) + 1
+
+    return root
+
+
+def copy_rope(node: Optional[RopeNode]) -> Optional[RopeNode]:
+    """Copy the rope rooted at the given node, node by node."""
+
+    if not node:
+        return None
+
+    root = node.copy()
+    pending_nodes = [root]
+    while pending_nodes:
+        node = pending_nodes.pop()
+        if node.left:
+            node.left = node.left.copy()
+            pending_nodes.append(node.left)
+        if node.right:
+            node.right = node.right.copy()
+            pending_nodes.append(node.right)
+
+    return root
+
+
+def push_down_reversal(node: RopeNode) -> None:
+    """Apply a pending reversal of a node to its children."""
+
+    # NOTE: Reversals are applied lazily. A reversed node swaps its children and
+    # passes the reversal on to them only when the tree beneath it is visited.
+
+    if not node.is_reversed:
+        return
+
+    node.left, node.right = node.right, node.left
+    for child in (node.left, node.right):
+        if child:
+            child.is_reversed = not child.is_reversed
+
+    node.is_reversed = False
+
+
+def split_rope(
+    node: Optional[RopeNode],
+    count: int,
+) -> tuple[Optional[RopeNode], Optional[RopeNode]]:
+    """Split a rope into its first given number of crates and the rest."""
+
+    if not node:
+        return None, None
+
+    push_down_reversal(node)
+
+    if rope_size(node.left) < count:
+        node.right, rest = split_rope(node.right, count - rope_size(node.left) - 1)
+        node.size = rope_size(node.left) + rope_size(node.right) + 1
+        return node, rest
+
+    first, node.left = split_rope(node.left, count)
+    node.size = rope_size(node.left) + rope_size(node.right) + 1
+    return first, node
+
+
+def merge_ropes(
+    first: Optional[RopeNode],
+    second: Optional[RopeNode],
+) -> Optional[RopeNode]:
+    """Join two ropes, placing the crates of the second after those of the first."""
+
+    if not first or not second:
+        return first or second
+
+    if first.priority > second.priority:
+        push_down_reversal(first)
+        first.right = merge_ropes(first.right, second)
+        first.size = rope_size(first.left) + rope_size(first.right) + 1
+        return first
+
+    push_down_reversal(second)
+    second.left = merge_ropes(first, second.left)
+    second.size = rope_size(second.left) + rope_size(second.right) + 1
+    return second
+
+
+def convert_to_ropes(stacks: list[SupplyStack]) -> list[CrateRope]:
+    """Convert supply stacks to ropes of crates."""
+
+    # NOTE: Ropes hold no reference cycles, but converting the stacks allocates a
+    # node per crate, and the collector would otherwise keep rescanning all of
+    # them. For large stacks that takes several times longer than the conversion.
+    # The collector is paused here rather than in the ropes themselves, so that
+    # building or copying a single rope leaves the state of the process alone.
+
+    with pause_garbage_collection():
+        return [CrateRope(stack) for stack in stacks]
+
+
+def move_crate_ropes_one_by_one(stacks: list[CrateRope], move: Move) -> list[CrateRope]:
+    """Move crates between ropes one by one.
+
+    Moving crates one at a time reverses their order, so the whole group is split
+    off, reversed, and joined onto the destination at once.
+    """
+
+    amount, source, destination = move
+
+    # NOTE: Moving crates one by one onto the stack they came from leaves them in
+    # their original order, which the reversal would otherwise break.
+
+    if source == destination:
+        return stacks
+
+    crates = stacks[source - 1].take_from_top(amount)
+    crates.reverse()
+    stacks[destination - 1].put_on_top(crates)
+
+    return stacks
+
+
+def move_crate_ropes_as_group(stacks: list[CrateRope], move: Move) -> list[CrateRope]:
+    """Move crates between ropes as a group.
+
+    This maintains their relative ordering when moving them.
+    """
+
+    amount, source, destination = move
+
+    crates = stacks[source - 1].take_from_top(amount)
+    stacks[destination - 1].put_on_top(crates)
+
+    return stacks
+
+
+def trace_top_items(
+    initial_stacks: list[SupplyStack],
+    rearrangement_procedure: Sequence[Move],
+    moves_as_group: bool,
+) -> str:
+    """Find the combined top items after the rearrangement without moving any crates.
+
+    Each final top position is traced backwards through the procedure to the initial
+    position of the crate that ends up there. Crates are moved either one by one or
+    as a group.
+    """
+
+    # NOTE: Positions are tracked as a stack index and a depth from the top of the
+    # stack, so only the heights of the stacks are needed to check which stacks end
+    # up empty, and those can be found without moving any crates.
+
+    heights = [len(stack) for stack in initial_stacks]
+    for amount, source, destination in rearrangement_procedure:
+        heights[source - 1] -= amount
+        heights[destination - 1] += amount
+
+    for stack_number, height in enumerate(heights, start=1):
+        if height <= 0:
+            raise ValueError(f"Stack {stack_number} is empty after the rearrangement")
+
+    positions = [[stack_index, 0] for stack_index in range(len(initial_stacks))]
+
+    for amount, source, destination in reversed(rearrangement_procedure):
+        if source == destination:
+            continue
+
+        source_index = source - 1
+        destination_index = destination - 1
+
+        for position in positions:
+            stack_index, depth = position
+
+            if stack_index == destination_index:
+                if depth >= amount:
+                    position[1] = depth - amount
+                else:
+                    position[0] = source_index
+                    position[1] = depth if moves_as_group else amount - 1 - depth
+            elif stack_index == source_index:
+                position[1] = depth + amount
+
+    return "".join(
+        initial_stacks[stack_index][-1 - depth] for stack_index, depth in positions
+    )
+
+
+def compile_procedure(
+    file_path: str,
+    initial_stacks: list[SupplyStack],
+    rearrangement_procedure: Iterable[Move],
+    moves_as_group: bool,
+    checkpoint_interval: int = CHECKPOINT_INTERVAL,
+) -> None:
+    """Compile a rearrangement procedure into a binary file with checkpoints.
+
+    The moves are stored as packed triplets of amount, source and destination. The
+    supply stacks are stored every few moves, as they are after moving the crates
+    from the given initial stacks one by one or as a group.
+    """
+
+    move_crates = move_crates_as_group if moves_as_group else move_crates_one_by_one
+
+    # NOTE: The number of moves is only known once the procedure has been read, so
+    # a placeholder header is written first and filled in at the end. The moves are
+    # written as they are read, while the checkpoints, which follow them in the
+    # file, are collected in a temporary file until the moves are complete.
+
+    with open(file_path, "wb") as file, TemporaryFile() as checkpoints_file:
+        file.write(bytes(COMPILED_PROCEDURE_HEADER.size))
+
+        stacks = [stack.copy() for stack in initial_stacks]
+        checkpoint_offsets = array("Q", [0])
+        checkpoint_offsets.append(checkpoints_file.write(encode_stacks(stacks)))
+
+        move_count = 0
+        moves = array("I")
+
+        for move in rearrangement_procedure:
+            moves.extend(move)
+            move_crates(stacks, move)
+            move_count += 1
+
+            if move_count % checkpoint_interval == 0:
+                file.write(moves)
+                del moves[:]
+
+                checkpoint_size = checkpoints_file.write(encode_stacks(stacks))
+                checkpoint_offsets.append(checkpoint_offsets[-1] + checkpoint_size)
+
+        file.write(moves)
+
+        # NOTE: The moves are padded to a multiple of eight bytes so that the
+        # checkpoint offsets which follow them stay aligned.
+
+        file.write(bytes(-file.tell() % 8))
+        file.write(checkpoint_offsets)
+
+        checkpoints_file.seek(0)
+        copyfileobj(checkpoints_file, file)
+
+        file.seek(0)
+        file.write(
+            COMPILED_PROCEDURE_HEADER.pack(
+                COMPILED_PROCEDURE_MAGIC,
+                COMPILED_PROCEDURE_VERSION,
+                len(initial_stacks),
+                move_count,
+                checkpoint_interval,
+                len(checkpoint_offsets) - 1,
+                moves_as_group,
+            )
+        )
+
+
+def encode_stacks(stacks: list[SupplyStack]) -> bytes:
+    """Encode supply stacks as their heights followed by their crates."""
+
+    heights = array("I", map(len, stacks))
+    crates = "".join("".join(stack) for stack in stacks)
+
+    return heights.tobytes() + crates.encode("latin-1")
+
+
+class CompiledProcedure(Sequence[Move]):
+    """Represents a compiled rearrangement procedure memory-mapped from a file.
+
+    The moves are read straight from the mapped file, so the procedure can be used
+    anywhere a list of moves can without being parsed or copied.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        """Map a compiled rearrangement procedure from a file."""
+
+        with open(file_path, "rb") as file:
+            self.data = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        (
+            magic,
+            version,
+            self.stack_count,
+            self.move_count,
+            self.checkpoint_interval,
+            checkpoint_count,
+            moves_as_group,
+        ) = COMPILED_PROCEDURE_HEADER.unpack_from(self.data)
+
+        if magic != COMPILED_PROCEDURE_MAGIC or version != COMPILED_PROCEDURE_VERSION:
+            self.data.close()
+            raise ValueError(f"Invalid compiled procedure: {file_path}")
+
+        self.moves_as_group = bool(moves_as_group)
+        self.move_crates = (
+            move_crates_as_group if self.moves_as_group else move_crates_one_by_one
+        )
+
+        self.view = view = memoryview(self.data)
+        moves_start = COMPILED_PROCEDURE_HEADER.size
+        moves_end = moves_start + self.move_count * 3 * array("I").itemsize
+        offsets_start = moves_end + -moves_end % 8
+        offsets_end = offsets_start + (checkpoint_count + 1) * array("Q").itemsize
+
+        self.moves = view[moves_start:moves_end].cast("I")
+        self.checkpoint_offsets = view[offsets_start:offsets_end].cast("Q")
+        self.checkpoints = view[offsets_end:]
+
+    def __enter__(self) -> "CompiledProcedure":
+        """Use the procedure as a context manager that closes it on exit."""
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the procedure on leaving the context."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the compiled procedure from memory.
+
+        The views into the mapped file must be released before the file can be
+        unmapped, so the procedure cannot be used once it has been closed.
+        """
+
+        for view in (self.moves, self.checkpoint_offsets, self.checkpoints, self.view):
+            view.release()
+
+        self.data.close()
+
+    def __len__(self) -> int:
+        """Count the moves in the procedure."""
+
+        return self.move_count
+
+    def __getitem__(self, index: int) -> Move:
+        """Get the move at the given position in the procedure."""
+
+        if index < 0:
+            index += self.move_count
+        if not 0 <= index < self.move_count:
+            raise IndexError("Move index out of range")
+
+        return Move(*self.moves[3 * index : 3 * index + 3])
+
+    def __iter__(self) -> Iterator[Move]:
+        """Iterate over the moves in the procedure."""
+
+        return self.moves_from(0)
+
+    def moves_from(self, index: int) -> Iterator[Move]:
+        """Iterate over the moves in the procedure from the given position onwards."""
+
+        moves = self.moves
+        for offset in range(3 * index, 3 * self.move_count, 3):
+            yield Move(moves[offset], moves[offset + 1], moves[offset + 2])
+
+    def checkpoint_stacks(self, checkpoint_index: int) -> list[SupplyStack]:
+        """Decode the supply stacks stored at a checkpoint."""
+
+        start = self.checkpoint_offsets[checkpoint_index]
+        end = self.checkpoint_offsets[checkpoint_index + 1]
+        checkpoint = self.checkpoints[start:end]
+
+        heights_size = self.stack_count * array("I").itemsize
+        heights = checkpoint[:heights_size].cast("I")
+        crates = str(checkpoint[heights_size:], "latin-1")
+
+        stacks = []
+        for stack_start, stack_end in pairwise(accumulate(heights, initial=0)):
+            stacks.append(list(crates[stack_start:stack_end]))
+
+        return stacks
+
+    def stacks_after(self, move_count: int) -> list[SupplyStack]:
+        """Get the supply stacks after the given number of moves.
+
+        The moves are replayed from the nearest checkpoint rather than the start.
+        """
+
+        if not 0 <= move_count <= self.move_count:
+            raise IndexError("Move count out of range")
+
+        checkpoint_index = move_count // self.checkpoint_interval
+        stacks = self.checkpoint_stacks(checkpoint_index)
+
+        first_move = checkpoint_index * self.checkpoint_interval
+        for move in islice(self.moves_from(first_move), move_count - first_move):
+            self.move_crates(stacks, move)
+
+        return stacks
+
+    def find_first_move_satisfying(
+        self,
+        condition: Callable[[list[SupplyStack]], bool],
+    ) -> Optional[int]:
+        """Find the fewest moves after which the supply stacks satisfy a condition.
+
+        The condition must keep holding once it holds. The checkpoints are bisected
+        first, so only the moves between two checkpoints are replayed one at a time.
+        """
+
+        checkpoint_count = len(self.checkpoint_offsets) - 1
+        checkpoint_index = bisect_left(
+            range(checkpoint_count),
+            True,
+            key=lambda index: condition(self.checkpoint_stacks(index)),
+        )
+
+        if checkpoint_index == 0:
+            return 0 if condition(self.checkpoint_stacks(0)) else None
+
+        # NOTE: The condition first holds somewhere after the previous checkpoint,
+        # so we replay the moves from there until it does.
+
+        first_move = (checkpoint_index - 1) * self.checkpoint_interval
+        stacks = self.checkpoint_stacks(checkpoint_index - 1)
+
+        for move_index, move in enumerate(self.moves_from(first_move), first_move):
+            self.move_crates(stacks, move)
+            if condition(stacks):
+                return move_index + 1
+
+        return None
+
+
 def combine_top_items(stacks: list[SupplyStack]) -> str:
     """Combine the top items of each stack into a single string."""
 
@@ -149,24 +815,20 @@ def main() -> None:
     input_file = INPUT_FILE
     file_path = path.join(path.dirname(__file__), input_file)
 
-    initial_stacks, rearrangement_procedure = read_operation_parameters(file_path)
-
-    final_stacks_with_one_by_one_movements = execute_rearrangement(
-        initial_stacks,
-        rearrangement_procedure,
-        move_crates_one_by_one,
+    (
+        final_stacks_with_one_by_one_movements,
+        final_stacks_with_group_movements,
+    ) = execute_rearrangements_from_file(
+        file_path,
+        [move_crates_one_by_one, move_crates_as_group],
     )
+
     top_items_with_one_by_one_movements = combine_top_items(
         final_stacks_with_one_by_one_movements,
     )
     print("After moving the crates one by one:")
     print(f"The combined top items are: {top_items_with_one_by_one_movements}")
 
-    final_stacks_with_group_movements = execute_rearrangement(
-        initial_stacks,
-        rearrangement_procedure,
-        move_crates_as_group,
-    )
     top_items_with_group_movements = combine_top_items(
         final_stacks_with_group_movements,
     )
@@ -0,0 +1,86 @@
+"""
+Advent of Code 2022, Day 6
+Benchmarks for finding markers in a synthetic, randomly generated data stream.
+"""
+
+import random
+import string
+from collections.abc import Callable
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import TypeVar
+
+from main import (
+    START_OF_MESSAGE_MARKER_SIZE,
+    find_first_marker_position_in_file,
+    find_first_marker_position_in_parallel,
+)
+
+STREAM_SIZE = 1 << 24
+SEED = 2022
+WORKER_COUNTS = (1, 2, 4, 8)
+
+T = TypeVar("T")
+
+
+def write_data_stream(file_path: str, size: int, marker_size: int) -> None:
+    """Write a random data stream whose only marker of the given size is at its end."""
+
+    # NOTE: With one letter fewer than the marker size, no marker can appear by
+    # chance, so the scans must read the whole stream before finding the marker.
+
+    generator = random.Random(SEED)
+    alphabet = string.ascii_lowercase[: marker_size - 1]
+    marker = string.ascii_lowercase[:marker_size][::-1]
+
+    data_stream = "".join(generator.choices(alphabet, k=size - marker_size)) + marker
+
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write(data_stream)
+        file.write("\n")
+
+
+def time_step(description: str, step: Callable[[], T]) -> tuple[T, float]:
+    """Run a step of the benchmark and report how long it took."""
+
+    start = perf_counter()
+    result = step()
+    elapsed = perf_counter() - start
+
+    print(f"  {description}: {elapsed:.3f}s")
+    return result, elapsed
+
+
+def main() -> None:
+    """Benchmark the sequential and parallel marker searches against each other."""
+
+    marker_size = START_OF_MESSAGE_MARKER_SIZE
+
+    with TemporaryDirectory() as directory:
+        file_path = path.join(directory, "stream.txt")
+        write_data_stream(file_path, STREAM_SIZE, marker_size)
+
+        print(f"Finding a marker of size {marker_size} in {STREAM_SIZE} bytes:")
+        position, sequential_elapsed = time_step(
+            "Sequential",
+            lambda: find_first_marker_position_in_file(file_path, marker_size),
+        )
+
+        for worker_count in WORKER_COUNTS:
+            parallel_position, elapsed = time_step(
+                f"{worker_count} worker(s)",
+                lambda: find_first_marker_position_in_parallel(
+                    file_path,
+                    marker_size,
+                    max_workers=worker_count,
+                ),
+            )
+            print(f"    Speedup: {sequential_elapsed / elapsed:.2f}x")
+
+            if parallel_position != position:
+                raise ValueError("The marker positions do not match")
+
+
+if __name__ == "__main__":
+    main()
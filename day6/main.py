@@ -4,8 +4,13 @@ Tuning Trouble
 https://adventofcode.com/2022/day/6
 """
 
-from collections import Counter
+import asyncio
+import re
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from os import path
+from typing import NamedTuple, Optional
 
 INPUT_FILE = "input.txt"
 TEST_FILE = "test.txt"
@@ -14,6 +19,25 @@ TEST_FILE = "test.txt"
 START_OF_MESSAGE_MARKER_SIZE = 14
 START_OF_PACKET_MARKER_SIZE = 4
 
+BYTE_ALPHABET_SIZE = 256
+CHUNK_SIZE = 1 << 16
+SEGMENT_SIZE = 1 << 20
+WHITESPACE_REGEX = re.compile(rb"\s")
+
+
+class Marker(NamedTuple):
+    """Represents a marker found in a data stream."""
+
+    size: int
+    position: int
+
+
+class SegmentResult(NamedTuple):
+    """Represents the outcome of searching a segment of a data stream for a marker."""
+
+    position: Optional[int]
+    is_end_of_stream: bool
+
 
 def read_data(file_path: str) -> str:
     """Read a data stream from a file."""
@@ -22,36 +46,264 @@ def read_data(file_path: str) -> str:
         return file.read().strip()
 
 
-def find_first_marker_position(data_stream: str, marker_size: int) -> int:
+class DistinctRunTracker:
+    """Tracks the run of distinct characters ending at each position of a data stream.
+
+    A marker of size N ends at every position where that run is at least N long, so
+    a single tracker serves markers of every size. The stream may be fed to the
+    tracker in pieces, and the run carries on from one piece to the next.
+    """
+
+    def __init__(self, is_byte_alphabet: bool = True) -> None:
+        """Create a new tracker positioned at the start of a data stream."""
+
+        # NOTE: Rather than counting the characters in the window, we remember where
+        # each character was last seen. When the current character was last seen
+        # inside the run, the run can skip ahead to just past that earlier
+        # occurrence. Byte alphabets fit in a fixed-size table, while other
+        # alphabets fall back to a mapping.
+
+        self.last_positions: list[int] | defaultdict[int, int] = (
+            [-1] * BYTE_ALPHABET_SIZE
+            if is_byte_alphabet
+            else defaultdict(lambda: -1)
+        )
+        self.run_start = 0
+        self.position = 0
+
+    def run_lengths(self, codes: Iterable[int]) -> Iterator[int]:
+        """Feed character codes to the tracker, yielding the run length after each."""
+
+        last_positions = self.last_positions
+        run_start = self.run_start
+        index = self.position
+
+        try:
+            for code in codes:
+                if last_positions[code] >= run_start:
+                    run_start = last_positions[code] + 1
+                last_positions[code] = index
+
+                index += 1
+                yield index - run_start
+        finally:
+            self.run_start = run_start
+            self.position = index
+
+
+def create_tracker(
+    data_stream: str | bytes,
+) -> tuple[Iterable[int], DistinctRunTracker]:
+    """Get the character codes of a data stream and a tracker suited to them."""
+
+    if isinstance(data_stream, str) and data_stream.isascii():
+        data_stream = data_stream.encode("ascii")
+
+    if isinstance(data_stream, bytes):
+        return data_stream, DistinctRunTracker()
+
+    return map(ord, data_stream), DistinctRunTracker(is_byte_alphabet=False)
+
+
+def find_first_marker_positions(
+    data_stream: str | bytes,
+    marker_sizes: Iterable[int],
+) -> dict[int, int]:
+    """Find the positions of the first markers of each of the given sizes.
+
+    The data stream is scanned once, stopping as soon as every marker is found.
+    """
+
+    codes, tracker = create_tracker(data_stream)
+
+    pending_marker_sizes = sorted(set(marker_sizes), reverse=True)
+    positions = {}
+
+    for position, run_length in enumerate(tracker.run_lengths(codes), start=1):
+        while pending_marker_sizes and pending_marker_sizes[-1] <= run_length:
+            positions[pending_marker_sizes.pop()] = position
+
+        if not pending_marker_sizes:
+            return positions
+
+    raise ValueError("No start-of-packet marker found.")
+
+
+def find_first_marker_position(data_stream: str | bytes, marker_size: int) -> int:
     """Find the position of the first marker of the given size in a data stream.
 
     Markers of size N are indicated by a sequence of N distinct, consecutive characters.
     """
 
-    # NOTE: We explicitly handle the first three characters of the data stream
-    # so that we can handle the fourth character in the loop rather than having
-    # to handle it separately.
+    return find_first_marker_positions(data_stream, [marker_size])[marker_size]
+
+
+def find_marker_positions(data_stream: str | bytes, marker_size: int) -> Iterator[int]:
+    """Find the positions of all markers of the given size in a data stream."""
+
+    codes, tracker = create_tracker(data_stream)
+
+    for position, run_length in enumerate(tracker.run_lengths(codes), start=1):
+        if run_length >= marker_size:
+            yield position
+
+
+def find_first_marker_position_in_file(
+    file_path: str,
+    marker_size: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """Find the position of the first marker of the given size in a data stream file.
+
+    The file is read in chunks, and reading stops as soon as a marker is found, so
+    only a single chunk is held in memory at a time. The data stream ends at the
+    first whitespace in the file.
+    """
+
+    # NOTE: A marker may straddle two chunks, so the last few bytes of each chunk
+    # are carried over and scanned again along with the next chunk. No marker can
+    # be missed, since any marker ending in a chunk starts within those bytes.
 
-    recent_character_counts = Counter(data_stream[: marker_size - 1])
-    index = marker_size - 1
+    carried_bytes = b""
+    carried_offset = 0
 
-    while index < len(data_stream):
-        current_character = data_stream[index]
-        recent_character_counts[current_character] += 1
+    with open(file_path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            end_of_stream = WHITESPACE_REGEX.search(chunk)
+            if end_of_stream:
+                chunk = chunk[: end_of_stream.start()]
 
-        if len(recent_character_counts) == marker_size:
-            return index + 1
+            window = carried_bytes + chunk
+            try:
+                return carried_offset + find_first_marker_position(window, marker_size)
+            except ValueError:
+                pass
 
-        oldest_character = data_stream[index - marker_size + 1]
-        recent_character_counts[oldest_character] -= 1
-        if recent_character_counts[oldest_character] == 0:
-            del recent_character_counts[oldest_character]
+            if end_of_stream:
+                break
 
-        index += 1
+            carried_size = min(len(window), marker_size - 1)
+            carried_bytes = window[len(window) - carried_size :]
+            carried_offset += len(window) - carried_size
 
     raise ValueError("No start-of-packet marker found.")
 
 
+def find_first_marker_position_in_segment(
+    file_path: str,
+    marker_size: int,
+    start: int,
+    stop: int,
+) -> SegmentResult:
+    """Find the position of the first marker ending within a segment of a file.
+
+    The segment holds the markers that end after its first few bytes, up to and
+    including the first few bytes of the next segment.
+    """
+
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        data = file.read(stop - start + marker_size - 1)
+
+    end_of_stream = WHITESPACE_REGEX.search(data)
+    if end_of_stream:
+        data = data[: end_of_stream.start()]
+
+    try:
+        position = start + find_first_marker_position(data, marker_size)
+    except ValueError:
+        position = None
+
+    return SegmentResult(position, end_of_stream is not None)
+
+
+def find_first_marker_position_in_parallel(
+    file_path: str,
+    marker_size: int,
+    segment_size: int = SEGMENT_SIZE,
+    max_workers: Optional[int] = None,
+) -> int:
+    """Find the position of the first marker of the given size in a data stream file.
+
+    The file is split into segments which are scanned by a pool of processes. Once
+    a segment finds a marker, the segments after it are no longer needed.
+    """
+
+    # NOTE: Consecutive segments overlap by one byte less than the marker size, so
+    # every marker lies wholly within at least one segment. Since the segments are
+    # in order, the first segment to find a marker holds the first marker overall.
+
+    file_size = path.getsize(file_path)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        segment_results = [
+            executor.submit(
+                find_first_marker_position_in_segment,
+                file_path,
+                marker_size,
+                start,
+                min(start + segment_size, file_size),
+            )
+            for start in range(0, file_size, segment_size)
+        ]
+
+        try:
+            for segment_result in segment_results:
+                position, is_end_of_stream = segment_result.result()
+                if position is not None:
+                    return position
+                if is_end_of_stream:
+                    break
+        finally:
+            for segment_result in segment_results:
+                segment_result.cancel()
+
+    raise ValueError("No start-of-packet marker found.")
+
+
+async def find_markers_in_stream(
+    reader: asyncio.StreamReader,
+    marker_sizes: Iterable[int] = (
+        START_OF_PACKET_MARKER_SIZE,
+        START_OF_MESSAGE_MARKER_SIZE,
+    ),
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[Marker]:
+    """Find the first markers of each of the given sizes in a live data stream.
+
+    Each marker is reported as soon as the bytes completing it arrive, and reading
+    stops once every marker has been found. Markers that have not been found by the
+    time the data stream ends are not reported. The data stream ends at the first
+    whitespace or when the reader reaches the end of its input.
+    """
+
+    # NOTE: Only the tracker carries state from one read to the next, so the bytes
+    # of each read can be discarded as soon as they have been scanned.
+
+    tracker = DistinctRunTracker()
+    pending_marker_sizes = sorted(set(marker_sizes), reverse=True)
+
+    while pending_marker_sizes:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            return
+
+        end_of_stream = WHITESPACE_REGEX.search(chunk)
+        if end_of_stream:
+            chunk = chunk[: end_of_stream.start()]
+
+        run_lengths = tracker.run_lengths(chunk)
+        for position, run_length in enumerate(run_lengths, start=tracker.position + 1):
+            while pending_marker_sizes and pending_marker_sizes[-1] <= run_length:
+                yield Marker(pending_marker_sizes.pop(), position)
+
+            if not pending_marker_sizes:
+                return
+
+        if end_of_stream:
+            return
+
+
 def main() -> None:
     """Read a data stream from a file and process it."""
 
@@ -60,19 +312,16 @@ def main() -> None:
 
     data_stream = read_data(file_path)
 
-    start_of_packet_marker_position = find_first_marker_position(
+    marker_positions = find_first_marker_positions(
         data_stream,
-        START_OF_PACKET_MARKER_SIZE,
+        [START_OF_PACKET_MARKER_SIZE, START_OF_MESSAGE_MARKER_SIZE],
     )
+
     print("The first start of packet marker is at position: ", end="")
-    print(start_of_packet_marker_position)
+    print(marker_positions[START_OF_PACKET_MARKER_SIZE])
 
-    start_of_message_marker_position = find_first_marker_position(
-        data_stream,
-        START_OF_MESSAGE_MARKER_SIZE,
-    )
     print("The first start of message marker is at position: ", end="")
-    print(start_of_message_marker_position)
+    print(marker_positions[START_OF_MESSAGE_MARKER_SIZE])
 
 
 if __name__ == "__main__":
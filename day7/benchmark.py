@@ -0,0 +1,89 @@
+"""
+Advent of Code 2022, Day 7
+Benchmarks for the filesystem traversals on a synthetic, deeply nested tree.
+"""
+
+from collections.abc import Callable, Iterator
+from time import perf_counter
+from typing import TypeVar
+
+from main import (
+    MAX_DIRECTORY_SIZE,
+    ROOT_DIRECTORY,
+    TOTAL_DISK_SPACE,
+    ChangeDirectory,
+    Command,
+    CompactTree,
+    DirectoryNode,
+    File,
+    Filesystem,
+    ListDirectory,
+    find_directories_with_max_total_size,
+    find_smallest_directory_to_make_space,
+    recreate_filesystem,
+)
+
+CHAIN_DEPTH = 100000
+FILE_SIZE = 100
+
+T = TypeVar("T")
+
+
+def generate_directory_chain(depth: int) -> Iterator[Command]:
+    """Generate commands describing a chain of directories nested to a given depth."""
+
+    yield ChangeDirectory(ROOT_DIRECTORY)
+
+    for level in range(depth):
+        yield ListDirectory([File(f"file{level}", FILE_SIZE)], [f"dir{level}"])
+        yield ChangeDirectory(f"dir{level}")
+
+
+def time_step(description: str, step: Callable[[], T]) -> T:
+    """Run a step of the benchmark and report how long it took."""
+
+    start = perf_counter()
+    result = step()
+    elapsed = perf_counter() - start
+
+    print(f"  {description}: {elapsed:.3f}s")
+    return result
+
+
+def benchmark_tree(create_directory: Callable[[str], DirectoryNode]) -> None:
+    """Benchmark building and querying a deep chain of directories."""
+
+    filesystem: Filesystem = time_step(
+        "Recreate the filesystem",
+        lambda: recreate_filesystem(
+            generate_directory_chain(CHAIN_DEPTH),
+            create_directory,
+        ),
+    )
+    used_space = time_step("Compute the directory sizes", lambda: filesystem.root.size)
+    time_step(
+        "Find directories with a maximum total size",
+        lambda: find_directories_with_max_total_size(filesystem, MAX_DIRECTORY_SIZE),
+    )
+    time_step(
+        "Find the smallest directory to make space",
+        lambda: find_smallest_directory_to_make_space(
+            filesystem,
+            TOTAL_DISK_SPACE,
+            TOTAL_DISK_SPACE - used_space // 2,
+        ),
+    )
+
+
+def main() -> None:
+    """Benchmark the filesystem traversals on a deep chain of directories."""
+
+    print(f"Object tree with {CHAIN_DEPTH} nested directories:")
+    benchmark_tree(DirectoryNode)
+
+    print(f"Compact tree with {CHAIN_DEPTH} nested directories:")
+    benchmark_tree(CompactTree().create_directory)
+
+
+if __name__ == "__main__":
+    main()
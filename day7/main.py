@@ -4,8 +4,20 @@ No Space Left On Device
 https://adventofcode.com/2022/day/7
 """
 
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from io import StringIO
+from itertools import accumulate
+from mmap import ACCESS_READ, mmap
 from os import path
-from typing import NamedTuple, Optional, Protocol
+from sys import getsizeof, stdout
+from tempfile import NamedTemporaryFile
+from typing import NamedTuple, Optional, Protocol, TextIO
 
 INPUT_FILE = "input.txt"
 TEST_FILE = "test.txt"
@@ -15,6 +27,19 @@ ROOT_DIRECTORY = "/"
 TOTAL_DISK_SPACE = 70000000
 UPDATE_SIZE = 30000000
 
+NO_NODE = -1
+RENDER_CHUNK_LINES = 4096
+
+SNAPSHOT_MAGIC = b"AOC7TREE"
+SNAPSHOT_VERSION = 1
+
+# NOTE: The header holds the magic bytes, the format version, the size and
+# modification time of the source transcript, the index of the root directory,
+# and the number of nodes, the number of names and the size of the name pool.
+# The columns that follow are stored in the native byte order of the machine.
+
+SNAPSHOT_HEADER = struct.Struct("<8sI4xQqQQQQ")
+
 
 class File(NamedTuple):
     """Represents a file in the filesystem."""
@@ -53,11 +78,21 @@ class FilesystemNode(Protocol):
     size: int
     parent: Optional["FilesystemNode"]
 
-    @property
-    def depth(self) -> int:
-        """Get the depth of the node in the filesystem."""
+    # NOTE: The depth of a node never changes once it is attached to its parent,
+    # so we store it on the node rather than walking up the parent chain each time.
+
+    depth: int
+
+
+class ChangeCounter:
+    """Counts the changes made to a tree of directory nodes."""
 
-        return self.parent.depth + 1 if self.parent else 0
+    __slots__ = ("count",)
+
+    def __init__(self) -> None:
+        """Create a new counter with no changes counted."""
+
+        self.count = 0
 
 
 class DirectoryNode(FilesystemNode):
@@ -68,6 +103,22 @@ class DirectoryNode(FilesystemNode):
 
         self.name = name
         self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+
+        # NOTE: The size of a directory is the total size of its contents. Rather than
+        # recomputing it from the whole subtree on every access, we store it on the
+        # node. Adding contents only marks the directory and its ancestors as stale,
+        # stopping at the first ancestor that is already stale, and stale sizes are
+        # recomputed together in one pass the next time a size is requested. This
+        # keeps building deeply nested trees linear rather than quadratic.
+
+        self._size = 0
+        self._size_is_stale = False
+
+        # NOTE: All nodes of a tree share a single change counter, so that anything
+        # derived from the tree as a whole can tell when it has become outdated.
+
+        self._changes = parent._changes if parent else ChangeCounter()
 
         self.files: dict[str, FileNode] = {}
         self.subdirectories: dict[str, DirectoryNode] = {}
@@ -76,38 +127,81 @@ class DirectoryNode(FilesystemNode):
     def size(self) -> int:
         """Get the total size of the directory and its contents."""
 
-        total_file_size = sum(file.size for file in self.files.values())
-        total_subdirectory_size = sum(
-            subdirectory.size for subdirectory in self.subdirectories.values()
-        )
+        if self._size_is_stale:
+            self._refresh_sizes()
 
-        return total_file_size + total_subdirectory_size
+        return self._size
+
+    @property
+    def change_count(self) -> int:
+        """Get the number of changes made to the tree the directory belongs to."""
+
+        return self._changes.count
 
     def add_file(self, file: File) -> None:
         """Add a file to the directory."""
 
         self.files[file.name] = FileNode(file, parent=self)
+        self._mark_size_stale()
 
     def add_subdirectory(self, directory: str) -> None:
-        """Add a subdirectory to the directory."""
+        """Add a subdirectory to the directory, unless it is already present."""
+
+        # NOTE: A directory may be listed more than once, and its subdirectories may
+        # have been explored in between, so existing subdirectories are kept as-is.
+
+        if directory in self.subdirectories:
+            return
 
         self.subdirectories[directory] = DirectoryNode(directory, parent=self)
+        self._mark_size_stale()
+
+    def _mark_size_stale(self) -> None:
+        """Mark the size of this directory and all of its ancestors as stale."""
+
+        self._changes.count += 1
+
+        node: Optional[DirectoryNode] = self
+        while node and not node._size_is_stale:
+            node._size_is_stale = True
+            node = node.parent
+
+    def _refresh_sizes(self) -> None:
+        """Recompute the stale sizes of this directory and its subdirectories."""
+
+        # NOTE: A directory's size depends on the sizes of its subdirectories, so
+        # we visit them in post-order, using an explicit stack so that arbitrarily
+        # deep trees do not exceed the recursion limit.
+
+        pending_directories = [(self, False)]
+        while pending_directories:
+            directory, children_refreshed = pending_directories.pop()
+
+            if not children_refreshed:
+                pending_directories.append((directory, True))
+                pending_directories.extend(
+                    (subdirectory, False)
+                    for subdirectory in directory.subdirectories.values()
+                    if subdirectory._size_is_stale
+                )
+                continue
+
+            total_file_size = sum(file.size for file in directory.files.values())
+            total_subdirectory_size = sum(
+                subdirectory._size
+                for subdirectory in directory.subdirectories.values()
+            )
+
+            directory._size = total_file_size + total_subdirectory_size
+            directory._size_is_stale = False
 
     def __str__(self) -> str:
         """Create a string representation of the directory node for printing."""
 
-        padding = " " * self.depth
-        self_repr = f"{padding}- {self.name}: ({self.size})"
-        if not self.files and not self.subdirectories:
-            return self_repr
-
-        children_reprs = [
-            f"\n{str(child)}"
-            for child in (*self.files.values(), *self.subdirectories.values())
-        ]
-        children_repr = "".join(children_reprs)
+        stream = StringIO()
+        render_tree(self, stream)
 
-        return f"{self_repr}{children_repr}"
+        return stream.getvalue().removesuffix("\n")
 
     def __repr__(self) -> str:
         """Create a string representation of the directory node for debugging."""
@@ -123,6 +217,7 @@ class FileNode(FilesystemNode):
 
         self.file = file
         self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
 
     @property
     def name(self) -> str:
@@ -148,6 +243,459 @@ class FileNode(FilesystemNode):
         return f"FileNode({self.name}, {self.size})"
 
 
+def child_key(parent: int, name_id: int) -> int:
+    """Pack the index of a parent and the name id of a child into a lookup key."""
+
+    return parent << 32 | name_id
+
+
+class CompactTree:
+    """Represents a filesystem tree stored in flat, array-backed columns.
+
+    Each node is identified by its index into the columns. The children of a node
+    are linked through first-child and next-sibling indexes, and names are interned
+    into a shared pool so that each distinct name is only stored once.
+    """
+
+    def __init__(self) -> None:
+        """Create a new, empty compact tree."""
+
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self.name_ids = array("i")
+        self.sizes = array("q")
+        self.depths = array("i")
+        self.is_directory = array("b")
+        self.stale_sizes = array("b")
+
+        self.names: list[str] = []
+        self.name_ids_by_name: dict[str, int] = {}
+        self.change_count = 0
+
+        # NOTE: Subdirectories are looked up by name whenever we change directory, so
+        # they are kept in a table keyed by their parent index and name id packed
+        # into a single integer. Files vastly outnumber directories, and a lookup
+        # entry would cost more than the file itself, so files are only looked up
+        # while a directory that already holds files is being listed again.
+
+        self.subdirectory_indexes: dict[int, int] = {}
+
+        self.listing_directory = NO_NODE
+        self.listing_start = NO_NODE
+        self.relisted_files: Optional[dict[int, int]] = None
+
+    def intern_name(self, name: str) -> int:
+        """Get the id of a name in the name pool, adding it if necessary."""
+
+        name_id = self.name_ids_by_name.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.name_ids_by_name[name] = name_id
+
+        return name_id
+
+    def add_node(self, name: str, size: int, parent: int, is_directory: bool) -> int:
+        """Add a node to the tree and get its index."""
+
+        name_id = self.intern_name(name)
+
+        if parent != NO_NODE and is_directory:
+            existing_index = self.subdirectory_indexes.get(child_key(parent, name_id))
+            if existing_index is not None:
+                return existing_index
+
+        if parent != NO_NODE and not is_directory:
+            existing_index = self.find_listed_file(parent, name_id)
+            if existing_index is not None:
+                self.sizes[existing_index] = size
+                self.mark_size_stale(parent)
+                return existing_index
+
+        index = len(self.parents)
+
+        self.parents.append(parent)
+        self.first_children.append(NO_NODE)
+        self.next_siblings.append(
+            self.first_children[parent] if parent != NO_NODE else NO_NODE
+        )
+        self.name_ids.append(name_id)
+        self.sizes.append(0 if is_directory else size)
+        self.depths.append(self.depths[parent] + 1 if parent != NO_NODE else 0)
+        self.is_directory.append(is_directory)
+        self.stale_sizes.append(False)
+
+        if parent != NO_NODE:
+            self.first_children[parent] = index
+            if is_directory:
+                self.subdirectory_indexes[child_key(parent, name_id)] = index
+                self.listing_directory = NO_NODE
+            elif self.relisted_files is not None:
+                self.relisted_files[name_id] = index
+            elif self.listing_start == NO_NODE:
+                self.listing_start = index
+            self.mark_size_stale(parent)
+
+        return index
+
+    def find_listed_file(self, parent: int, name_id: int) -> Optional[int]:
+        """Find a file that is listed again in a directory and get its index."""
+
+        # NOTE: A new listing starts when files are added to another directory than
+        # before, after a subdirectory was added, or when the first file of the
+        # current listing comes round again. Only then are the files already in the
+        # directory gathered by name id, and only for as long as that listing lasts.
+
+        if parent != self.listing_directory or (
+            self.relisted_files is None
+            and self.listing_start != NO_NODE
+            and self.name_ids[self.listing_start] == name_id
+        ):
+            self.listing_directory = parent
+            self.listing_start = NO_NODE
+            self.relisted_files = {
+                self.name_ids[child]: child
+                for child in self.children(parent)
+                if not self.is_directory[child]
+            } or None
+
+        if self.relisted_files is None:
+            return None
+
+        return self.relisted_files.get(name_id)
+
+    def mark_size_stale(self, index: int) -> None:
+        """Mark the size of a directory and all of its ancestors as stale."""
+
+        self.change_count += 1
+
+        while index != NO_NODE and not self.stale_sizes[index]:
+            self.stale_sizes[index] = True
+            index = self.parents[index]
+
+    def directory_size(self, index: int) -> int:
+        """Get the total size of a directory, recomputing it if it is stale."""
+
+        if self.stale_sizes[index]:
+            self.refresh_sizes(index)
+
+        return self.sizes[index]
+
+    def refresh_sizes(self, index: int) -> None:
+        """Recompute the stale sizes of a directory and its subdirectories."""
+
+        pending_nodes = [(index, False)]
+        while pending_nodes:
+            node, children_refreshed = pending_nodes.pop()
+            children = self.children(node)
+
+            if not children_refreshed:
+                pending_nodes.append((node, True))
+                pending_nodes.extend(
+                    (child, False) for child in children if self.stale_sizes[child]
+                )
+                continue
+
+            self.sizes[node] = sum(self.sizes[child] for child in children)
+            self.stale_sizes[node] = False
+
+    def children(self, index: int) -> list[int]:
+        """Get the indexes of the children of a node in insertion order."""
+
+        # NOTE: New children are linked in at the front of the sibling list,
+        # so walking the list visits them from newest to oldest.
+
+        children = []
+        child = self.first_children[index]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_siblings[child]
+
+        children.reverse()
+        return children
+
+    def create_directory(self, name: str) -> "CompactDirectoryNode":
+        """Create a new directory without a parent in the tree."""
+
+        index = self.add_node(name, 0, NO_NODE, True)
+        return CompactDirectoryNode(self, index)
+
+    def memory_footprint(self) -> int:
+        """Estimate the number of bytes used to store the tree."""
+
+        columns = (
+            self.parents,
+            self.first_children,
+            self.next_siblings,
+            self.name_ids,
+            self.sizes,
+            self.depths,
+            self.is_directory,
+            self.stale_sizes,
+        )
+        columns_size = sum(column.itemsize * len(column) for column in columns)
+
+        names_size = getsizeof(self.names) + getsizeof(self.name_ids_by_name)
+        names_size += sum(getsizeof(name) for name in self.names)
+
+        lookup_size = getsizeof(self.subdirectory_indexes)
+        lookup_size += sum(
+            getsizeof(key) + getsizeof(index)
+            for key, index in self.subdirectory_indexes.items()
+        )
+
+        return columns_size + names_size + lookup_size
+
+
+class CompactSubdirectories(Mapping[str, "CompactDirectoryNode"]):
+    """Represents the subdirectories of a directory in a compact tree by name."""
+
+    def __init__(self, tree: CompactTree, index: int) -> None:
+        """Create a new view of the subdirectories of a directory."""
+
+        self.tree = tree
+        self.index = index
+
+    def __getitem__(self, name: str) -> "CompactDirectoryNode":
+        """Get a subdirectory by its name."""
+
+        name_id = self.tree.name_ids_by_name.get(name)
+        if name_id is None:
+            raise KeyError(name)
+
+        child = self.tree.subdirectory_indexes.get(child_key(self.index, name_id))
+        if child is None:
+            raise KeyError(name)
+
+        return CompactDirectoryNode(self.tree, child)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the subdirectories."""
+
+        tree = self.tree
+        for child in tree.children(self.index):
+            if tree.is_directory[child]:
+                yield tree.names[tree.name_ids[child]]
+
+    def __len__(self) -> int:
+        """Count the subdirectories."""
+
+        return sum(1 for _ in self)
+
+    def values(self) -> list["CompactDirectoryNode"]:
+        """Get the subdirectories without looking each of them up by name."""
+
+        tree = self.tree
+        return [
+            CompactDirectoryNode(tree, child)
+            for child in tree.children(self.index)
+            if tree.is_directory[child]
+        ]
+
+
+class CompactDirectoryNode(DirectoryNode):
+    """Represents a view of a directory node stored in a compact tree."""
+
+    # NOTE: These views hold no data of their own, so they are created on demand
+    # and discarded freely. All state lives in the columns of the compact tree.
+
+    def __init__(self, tree: CompactTree, index: int) -> None:
+        """Create a new view of a directory node."""
+
+        self.tree = tree
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        """Get the name of the directory."""
+
+        return self.tree.names[self.tree.name_ids[self.index]]
+
+    @property
+    def size(self) -> int:
+        """Get the total size of the directory and its contents."""
+
+        return self.tree.directory_size(self.index)
+
+    @property
+    def change_count(self) -> int:
+        """Get the number of changes made to the tree the directory belongs to."""
+
+        return self.tree.change_count
+
+    @property
+    def depth(self) -> int:
+        """Get the depth of the directory in the filesystem."""
+
+        return self.tree.depths[self.index]
+
+    @property
+    def parent(self) -> Optional["CompactDirectoryNode"]:
+        """Get the parent of the directory."""
+
+        parent = self.tree.parents[self.index]
+        return CompactDirectoryNode(self.tree, parent) if parent != NO_NODE else None
+
+    @property
+    def files(self) -> dict[str, FileNode]:
+        """Get the files in the directory by name."""
+
+        tree = self.tree
+        files = {}
+        for child in tree.children(self.index):
+            if not tree.is_directory[child]:
+                file = File(tree.names[tree.name_ids[child]], tree.sizes[child])
+                files[file.name] = FileNode(file, parent=self)
+
+        return files
+
+    @property
+    def subdirectories(self) -> CompactSubdirectories:
+        """Get the subdirectories of the directory by name."""
+
+        return CompactSubdirectories(self.tree, self.index)
+
+    def add_file(self, file: File) -> None:
+        """Add a file to the directory."""
+
+        self.tree.add_node(file.name, file.size, self.index, False)
+
+    def add_subdirectory(self, directory: str) -> None:
+        """Add a subdirectory to the directory."""
+
+        self.tree.add_node(directory, 0, self.index, True)
+
+
+class SnapshotNames(Sequence[str]):
+    """Represents the name pool of a snapshot, decoding names as they are needed."""
+
+    def __init__(self, offsets: memoryview, pool: memoryview) -> None:
+        """Create a new view of the names stored in a snapshot."""
+
+        self.offsets = offsets
+        self.pool = pool
+
+    def __getitem__(self, name_id: int) -> str:
+        """Get a name by its id."""
+
+        start = self.offsets[name_id]
+        end = self.offsets[name_id + 1]
+        return str(self.pool[start:end], "utf-8")
+
+    def __len__(self) -> int:
+        """Count the names."""
+
+        return len(self.offsets) - 1
+
+
+class SnapshotTree(CompactTree):
+    """Represents a compact tree memory-mapped from a snapshot on disk.
+
+    The columns are read-only views into the mapped file, so loading does not
+    copy or parse the tree. Snapshots cannot be modified once they are written.
+    """
+
+    def __init__(self, snapshot: mmap, header: tuple[int, ...]) -> None:
+        """Create a new tree over the contents of a mapped snapshot."""
+
+        *_, node_count, name_count, pool_size = header
+
+        self.snapshot = snapshot
+        data = memoryview(snapshot)
+        offset = SNAPSHOT_HEADER.size
+
+        def take_column(typecode: str, length: int) -> memoryview:
+            nonlocal offset
+            column_size = array(typecode).itemsize * length
+            column = data[offset : offset + column_size].cast(typecode)
+            offset += column_size
+            return column
+
+        self.sizes = take_column("q", node_count)
+        name_offsets = take_column("q", name_count + 1)
+        self.parents = take_column("i", node_count)
+        self.first_children = take_column("i", node_count)
+        self.next_siblings = take_column("i", node_count)
+        self.name_ids = take_column("i", node_count)
+        self.depths = take_column("i", node_count)
+        self.is_directory = take_column("b", node_count)
+        self.stale_sizes = take_column("b", node_count)
+
+        self.names = SnapshotNames(name_offsets, data[offset : offset + pool_size])
+        self.change_count = 0
+
+    @cached_property
+    def name_ids_by_name(self) -> dict[str, int]:
+        """Get the ids of the names in the name pool by name."""
+
+        return {name: name_id for name_id, name in enumerate(self.names)}
+
+    @cached_property
+    def subdirectory_indexes(self) -> dict[int, int]:
+        """Get the indexes of the subdirectories by parent index and name id."""
+
+        return {
+            child_key(parent, name_id): index
+            for index, (parent, name_id, is_directory) in enumerate(
+                zip(self.parents, self.name_ids, self.is_directory)
+            )
+            if is_directory and parent != NO_NODE
+        }
+
+    def add_node(self, name: str, size: int, parent: int, is_directory: bool) -> int:
+        """Add a node to the tree and get its index."""
+
+        raise ValueError("Snapshots are read-only")
+
+
+class DirectorySizeIndex:
+    """Represents an index of the directories in a filesystem, ordered by size.
+
+    Prefix sums over the ordered sizes let threshold queries be answered with a
+    binary search rather than a walk over the whole tree.
+    """
+
+    def __init__(self, root: DirectoryNode) -> None:
+        """Create a new index of the directories beneath and including the root."""
+
+        self.change_count = root.change_count
+
+        # NOTE: The sort is stable and the walk visits parents first, so among
+        # directories of equal size the one closest to the root comes first.
+
+        self.directories = sorted(
+            (Directory(node.name, node.size) for node in walk_directories(root)),
+            key=lambda directory: directory.size,
+        )
+        self.sizes = [directory.size for directory in self.directories]
+        self.cumulative_sizes = [0, *accumulate(self.sizes)]
+
+    def directories_at_most(self, maximum_size: int) -> list[Directory]:
+        """Get all directories of a size of at most the given maximum size."""
+
+        return self.directories[: bisect_right(self.sizes, maximum_size)]
+
+    def total_size_at_most(self, maximum_size: int) -> int:
+        """Sum the sizes of all directories of a size of at most the given size."""
+
+        return self.cumulative_sizes[bisect_right(self.sizes, maximum_size)]
+
+    def smallest_at_least(self, minimum_size: int) -> Optional[Directory]:
+        """Get the smallest directory of a size of at least the given minimum size."""
+
+        index = bisect_left(self.sizes, minimum_size)
+        return self.directories[index] if index < len(self.directories) else None
+
+    def largest(self, count: int) -> list[Directory]:
+        """Get the given number of largest directories, largest first."""
+
+        if count <= 0:
+            return []
+
+        return self.directories[: -count - 1 : -1]
+
+
 class Filesystem:
     """Represents the filesystem as a whole."""
 
@@ -155,59 +703,137 @@ class Filesystem:
         """Create a new filesystem."""
 
         self.root = root
+        self._size_index: Optional[DirectorySizeIndex] = None
+
+    @property
+    def size_index(self) -> DirectorySizeIndex:
+        """Get the index of the directories in the filesystem by size.
+
+        The index is built on first use, and built again on the first use after the
+        filesystem has changed, so it always reflects the filesystem as it is.
+        """
+
+        index = self._size_index
+        if index is None or index.change_count != self.root.change_count:
+            index = self._size_index = DirectorySizeIndex(self.root)
+
+        return index
 
     def __str__(self) -> str:
         """Create a string representation of the filesystem for printing."""
 
         return str(self.root)
 
+    def render(self, stream: TextIO, max_depth: Optional[int] = None) -> None:
+        """Write a representation of the filesystem to a text stream."""
+
+        render_tree(self.root, stream, max_depth)
+
+
+def render_tree(
+    root: FilesystemNode,
+    stream: TextIO,
+    max_depth: Optional[int] = None,
+) -> None:
+    """Write a representation of a tree to a text stream, one line per node.
+
+    Nodes more than the given maximum depth below the root are left out.
+    """
+
+    # NOTE: Directory trees can be far deeper than the recursion limit, so we
+    # walk the tree with an explicit stack. Children are pushed in reverse so
+    # that they are popped in the order they appear in the directory. Lines are
+    # written in chunks so that the whole representation is never held at once.
+
+    chunk: list[str] = []
+    pending_nodes: list[FilesystemNode] = [root]
+    while pending_nodes:
+        node = pending_nodes.pop()
+        padding = " " * node.depth
+        chunk.append(f"{padding}- {node.name}: ({node.size})\n")
+
+        if len(chunk) >= RENDER_CHUNK_LINES:
+            stream.write("".join(chunk))
+            chunk.clear()
+
+        if not isinstance(node, DirectoryNode):
+            continue
+
+        if max_depth is not None and node.depth - root.depth >= max_depth:
+            continue
+
+        children = [*node.files.values(), *node.subdirectories.values()]
+        pending_nodes.extend(reversed(children))
+
+    stream.write("".join(chunk))
+
 
-def read_terminal_output(file_path: str) -> list[Command]:
-    """Read the terminal output from a file as a list of commands."""
+def read_terminal_output(file_path: str) -> Iterator[Command]:
+    """Read the terminal output from a file as a stream of commands."""
 
     with open(file_path, encoding="utf-8") as file:
-        lines = [line.strip() for line in file.readlines()]
+        yield from parse_terminal_output(file)
 
-    commands = []
-    index = 0
-    while index < len(lines):
-        line = lines[index]
-        segments = line.split()
-        command_type = segments[1]
 
-        index += 1
-        if command_type == "cd":
-            directory = segments[2]
-            commands.append(ChangeDirectory(directory))
+def parse_terminal_output(lines: Iterable[str]) -> Iterator[Command]:
+    """Parse commands from lines of terminal output, one command at a time."""
+
+    # NOTE: The output of a listing is only known to be complete once the next
+    # command (or the end of the output) is reached, so we accumulate the current
+    # listing and yield it when that happens. Only one listing is held at a time.
+
+    listing: Optional[ListDirectory] = None
+
+    for line in lines:
+        segments = line.split()
+        if not segments:
             continue
 
-        files = []
-        subdirectories = []
+        if segments[0] != "$":
+            if listing is None:
+                raise ValueError(f"Output outside of a listing: {line.strip()}")
 
-        while index < len(lines) and not lines[index].startswith("$"):
-            segments = lines[index].split()
             if segments[0] == "dir":
-                subdirectories.append(segments[1])
+                listing.subdirectories.append(segments[1])
             else:
                 size = int(segments[0])
                 name = segments[1]
-                files.append(File(name, size))
-            index += 1
+                listing.files.append(File(name, size))
+            continue
+
+        if listing is not None:
+            yield listing
+            listing = None
+
+        command_type = segments[1]
+        if command_type == "cd":
+            directory = segments[2]
+            yield ChangeDirectory(directory)
+        else:
+            listing = ListDirectory([], [])
 
-        commands.append(ListDirectory(files, subdirectories))
+    if listing is not None:
+        yield listing
 
-    return commands
 
+def recreate_filesystem(
+    commands: Iterable[Command],
+    create_directory: Callable[[str], DirectoryNode] = DirectoryNode,
+    create_missing_directories: bool = False,
+) -> Filesystem:
+    """Recreate the filesystem from the commands in the terminal output.
 
-def recreate_filesystem(commands: list[str]) -> Filesystem:
-    """Recreate the filesystem from the commands in the terminal output."""
+    The tree representation is chosen by the function used to create its directories.
+    Partial transcripts may change into directories they never listed, in which case
+    those directories can be created as they are entered.
+    """
 
     # NOTE: We assume the first command is always a change of directory to the root.
     # Since the root directory will never normally be a subdrectory, we create a
     # temporary sentinel node to act as the parent of the root directory so that
     # we can handle all commands in a uniform manner.
 
-    head_node = DirectoryNode("TEMP")
+    head_node = create_directory("TEMP")
     head_node.add_subdirectory(ROOT_DIRECTORY)
 
     current_node: DirectoryNode = head_node
@@ -217,7 +843,11 @@ def recreate_filesystem(commands: list[str]) -> Filesystem:
             case ChangeDirectory(directory):
                 if directory == "..":
                     current_node = current_node.parent
+                elif directory == ROOT_DIRECTORY:
+                    current_node = head_node.subdirectories[ROOT_DIRECTORY]
                 else:
+                    if create_missing_directories:
+                        current_node.add_subdirectory(directory)
                     current_node = current_node.subdirectories[directory]
             case ListDirectory(files, subdirectories):
                 for file in files:
@@ -229,23 +859,251 @@ def recreate_filesystem(commands: list[str]) -> Filesystem:
     return filesystem
 
 
+def recreate_partial_filesystem(file_path: str) -> Filesystem:
+    """Recreate the part of a filesystem described by a single transcript."""
+
+    return recreate_filesystem(
+        read_terminal_output(file_path),
+        CompactTree().create_directory,
+        create_missing_directories=True,
+    )
+
+
+def merge_filesystems(filesystems: Iterable[Filesystem]) -> Filesystem:
+    """Merge partial filesystems into a single filesystem.
+
+    Directories that appear in more than one filesystem are merged by name, and
+    files listed more than once keep the size from the last filesystem listing them.
+    """
+
+    head_node = DirectoryNode("TEMP")
+    head_node.add_subdirectory(ROOT_DIRECTORY)
+    merged_root = head_node.subdirectories[ROOT_DIRECTORY]
+
+    for filesystem in filesystems:
+        pending_directories = [(filesystem.root, merged_root)]
+        while pending_directories:
+            source_directory, target_directory = pending_directories.pop()
+
+            for file_node in source_directory.files.values():
+                target_directory.add_file(file_node.file)
+
+            for subdirectory in source_directory.subdirectories.values():
+                target_directory.add_subdirectory(subdirectory.name)
+                target_subdirectory = target_directory.subdirectories[subdirectory.name]
+                pending_directories.append((subdirectory, target_subdirectory))
+
+    return Filesystem(merged_root)
+
+
+def recreate_filesystem_from_transcripts(
+    file_paths: Iterable[str],
+    max_workers: Optional[int] = None,
+) -> Filesystem:
+    """Recreate a filesystem from many transcripts, each covering part of it.
+
+    The transcripts are parsed into partial filesystems in parallel processes, and
+    the partial filesystems are merged in the order the transcripts were given.
+    """
+
+    # NOTE: The partial filesystems use the compact tree so that they are cheap to
+    # send between processes and can be pickled no matter how deep they are.
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        partial_filesystems = executor.map(recreate_partial_filesystem, file_paths)
+        return merge_filesystems(partial_filesystems)
+
+
+def walk_directories(root: DirectoryNode) -> Iterator[DirectoryNode]:
+    """Walk all directories beneath and including the root, parents first."""
+
+    # NOTE: Directory sizes are maintained as the tree is built, so no directory
+    # needs its children visited first. We use an explicit stack rather than
+    # recursion so that arbitrarily deep trees can be walked.
+
+    pending_directories = [root]
+    while pending_directories:
+        directory = pending_directories.pop()
+        yield directory
+
+        subdirectories = list(directory.subdirectories.values())
+        pending_directories.extend(reversed(subdirectories))
+
+
+def copy_to_compact_tree(root: DirectoryNode) -> CompactDirectoryNode:
+    """Copy a directory and everything beneath it into a new compact tree."""
+
+    tree = CompactTree()
+    root_index = tree.add_node(root.name, 0, NO_NODE, True)
+
+    # NOTE: The copied directory keeps its depth, so that the copy renders with
+    # the same indentation as the source. Depths beneath it follow from it.
+
+    tree.depths[root_index] = root.depth
+
+    pending_directories = [(root, root_index)]
+    while pending_directories:
+        directory, index = pending_directories.pop()
+
+        for file_node in directory.files.values():
+            tree.add_node(file_node.name, file_node.size, index, False)
+
+        for subdirectory in directory.subdirectories.values():
+            subdirectory_index = tree.add_node(subdirectory.name, 0, index, True)
+            pending_directories.append((subdirectory, subdirectory_index))
+
+    return CompactDirectoryNode(tree, root_index)
+
+
+def save_snapshot(filesystem: Filesystem, snapshot_path: str, source_path: str) -> None:
+    """Save a filesystem recreated from a transcript as a snapshot on disk.
+
+    The size and modification time of the transcript are recorded so that the
+    snapshot can be recognized as stale when the transcript changes.
+    """
+
+    root = filesystem.root
+    if not isinstance(root, CompactDirectoryNode):
+        root = copy_to_compact_tree(root)
+
+    tree = root.tree
+    if isinstance(tree, SnapshotTree):
+        raise ValueError("Filesystem is already a snapshot")
+
+    # NOTE: Sizes are only recomputed when they are requested, so we make sure
+    # every stale size is up to date before the snapshot stores them.
+
+    for index, parent in enumerate(tree.parents):
+        if parent == NO_NODE:
+            tree.directory_size(index)
+
+    encoded_names = [name.encode("utf-8") for name in tree.names]
+    name_offsets = array("q", [0, *accumulate(map(len, encoded_names))])
+    pool = b"".join(encoded_names)
+
+    source_stat = os.stat(source_path)
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_VERSION,
+        source_stat.st_size,
+        source_stat.st_mtime_ns,
+        root.index,
+        len(tree.parents),
+        len(tree.names),
+        len(pool),
+    )
+
+    # NOTE: The 8-byte columns come first so that every column stays aligned.
+
+    columns = (
+        tree.sizes,
+        name_offsets,
+        tree.parents,
+        tree.first_children,
+        tree.next_siblings,
+        tree.name_ids,
+        tree.depths,
+        tree.is_directory,
+        tree.stale_sizes,
+    )
+
+    # NOTE: The snapshot is written to a temporary file next to it and moved into
+    # place once complete, so an interrupted save never leaves a snapshot behind
+    # whose header matches the transcript but whose contents are cut short.
+
+    file = NamedTemporaryFile(
+        "wb",
+        dir=path.dirname(path.abspath(snapshot_path)),
+        prefix=f"{path.basename(snapshot_path)}.",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with file:
+            file.write(header)
+            for column in columns:
+                file.write(column.tobytes())
+            file.write(pool)
+        os.replace(file.name, snapshot_path)
+    except BaseException:
+        os.remove(file.name)
+        raise
+
+
+def snapshot_size(node_count: int, name_count: int, pool_size: int) -> int:
+    """Get the number of bytes in a snapshot of the given number of nodes and names."""
+
+    node_size = sum(array(typecode).itemsize for typecode in "qiiiiibb")
+    name_offsets_size = array("q").itemsize * (name_count + 1)
+
+    return SNAPSHOT_HEADER.size + node_size * node_count + name_offsets_size + pool_size
+
+
+def load_snapshot(snapshot_path: str, source_path: str) -> Optional[Filesystem]:
+    """Load a filesystem from a snapshot on disk by memory-mapping it.
+
+    Nothing is loaded if the snapshot does not exist, is not a valid snapshot,
+    or was saved from a different version of the transcript.
+    """
+
+    if not path.exists(snapshot_path):
+        return None
+
+    with open(snapshot_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < SNAPSHOT_HEADER.size:
+            return None
+        snapshot = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+    header = SNAPSHOT_HEADER.unpack_from(snapshot)
+    magic, version, source_size, source_mtime, root_index, *counts = header
+    node_count, name_count, pool_size = counts
+
+    source_stat = os.stat(source_path)
+    if (
+        magic != SNAPSHOT_MAGIC
+        or version != SNAPSHOT_VERSION
+        or source_size != source_stat.st_size
+        or source_mtime != source_stat.st_mtime_ns
+        or len(snapshot) != snapshot_size(node_count, name_count, pool_size)
+        or not 0 <= root_index < node_count
+    ):
+        snapshot.close()
+        return None
+
+    tree = SnapshotTree(snapshot, header)
+    return Filesystem(CompactDirectoryNode(tree, root_index))
+
+
+def load_or_recreate_filesystem(file_path: str, snapshot_path: str) -> Filesystem:
+    """Load a filesystem from its snapshot, recreating and saving it if necessary."""
+
+    filesystem = load_snapshot(snapshot_path, file_path)
+    if filesystem:
+        return filesystem
+
+    filesystem = recreate_filesystem(
+        read_terminal_output(file_path),
+        CompactTree().create_directory,
+    )
+    save_snapshot(filesystem, snapshot_path, file_path)
+
+    return filesystem
+
+
 def find_directories_with_max_total_size(
     filesystem: Filesystem,
     maximum_total_size: int,
 ) -> list[Directory]:
     """Find all directories of a size of at most the given maximum total size."""
 
-    def find_directories(node: DirectoryNode) -> list[Directory]:
-        directories = []
-        if node.size <= maximum_total_size:
-            directories.append(Directory(node.name, node.size))
+    # NOTE: The directories are listed in pre-order, parents before their
+    # subdirectories. Use the size index instead when size order is wanted.
 
-        for subdirectory in node.subdirectories.values():
-            directories.extend(find_directories(subdirectory))
-
-        return directories
-
-    return find_directories(filesystem.root)
+    return [
+        Directory(node.name, node.size)
+        for node in walk_directories(filesystem.root)
+        if node.size <= maximum_total_size
+    ]
 
 
 def sum_directory_sizes(directories: list[Directory]) -> int:
@@ -265,25 +1123,33 @@ def find_smallest_directory_to_make_space(
     unused_space = maximum_available_space - used_space
     minimum_directory_size = required_space - unused_space
 
-    def find_directory_to_delete(node: DirectoryNode) -> Optional[Directory]:
-        target = None
-        if node.size >= minimum_directory_size:
-            target = Directory(node.name, node.size)
-
-        for subdirectory in node.subdirectories.values():
-            directory = find_directory_to_delete(subdirectory)
-            if directory:
-                target = min(target, directory, key=lambda directory: directory.size)
-
-        return target
-
-    directory = find_directory_to_delete(filesystem.root)
+    directory = filesystem.size_index.smallest_at_least(minimum_directory_size)
     if not directory:
         raise ValueError("No directory found to delete")
 
     return directory
 
 
+def estimate_memory_footprint(filesystem: Filesystem) -> int:
+    """Estimate the number of bytes used to store the tree of a filesystem."""
+
+    if isinstance(filesystem.root, CompactDirectoryNode):
+        return filesystem.root.tree.memory_footprint()
+
+    total_size = 0
+    for directory in walk_directories(filesystem.root):
+        total_size += getsizeof(directory) + getsizeof(directory.__dict__)
+        total_size += getsizeof(directory.name) + getsizeof(directory.size)
+        total_size += getsizeof(directory.files) + getsizeof(directory.subdirectories)
+
+        for file_node in directory.files.values():
+            total_size += getsizeof(file_node) + getsizeof(file_node.__dict__)
+            total_size += getsizeof(file_node.file)
+            total_size += getsizeof(file_node.name) + getsizeof(file_node.size)
+
+    return total_size
+
+
 def main() -> None:
     """Read terminal output from a file and process the filesystem it describes."""
 
@@ -293,7 +1159,7 @@ def main() -> None:
     commands = read_terminal_output(file_path)
 
     filesystem = recreate_filesystem(commands)
-    print(filesystem)
+    filesystem.render(stdout)
 
     small_directories = find_directories_with_max_total_size(
         filesystem,
@@ -312,6 +1178,21 @@ def main() -> None:
     )
     print("The smallest directory to delete to make space:", directory_to_delete)
 
+    compact_filesystem = recreate_filesystem(
+        read_terminal_output(file_path),
+        CompactTree().create_directory,
+    )
+    print(
+        "Estimated memory footprint of the object tree:",
+        estimate_memory_footprint(filesystem),
+        "bytes",
+    )
+    print(
+        "Estimated memory footprint of the compact tree:",
+        estimate_memory_footprint(compact_filesystem),
+        "bytes",
+    )
+
 
 if __name__ == "__main__":
     main()
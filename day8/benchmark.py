@@ -0,0 +1,91 @@
+"""
+Advent of Code 2022, Day 8
+Benchmarks for counting visible trees on a synthetic, randomly generated grid.
+"""
+
+import random
+from collections.abc import Callable
+from time import perf_counter
+from typing import TypeVar
+
+from main import (
+    MAX_HEIGHT,
+    MIN_HEIGHT,
+    HeightGrid,
+    count_visible_trees,
+    count_visible_trees_in_parallel,
+    count_visible_trees_vectorized,
+    np,
+)
+
+GRID_SIZE = 2000
+SEED = 2022
+WORKER_COUNTS = (1, 2, 4, 8)
+
+T = TypeVar("T")
+
+
+def generate_tree_heights(rows: int, cols: int) -> HeightGrid:
+    """Generate a grid of random tree heights."""
+
+    # NOTE: Trees of the maximum height end a scan early, so we leave them out to
+    # make sure that every scan runs the whole length of its row or column.
+
+    generator = random.Random(SEED)
+    return [
+        [generator.randint(MIN_HEIGHT, MAX_HEIGHT - 1) for _ in range(cols)]
+        for _ in range(rows)
+    ]
+
+
+def time_step(description: str, step: Callable[[], T]) -> T:
+    """Run a step of the benchmark and report how long it took."""
+
+    start = perf_counter()
+    result = step()
+    elapsed = perf_counter() - start
+
+    print(f"  {description}: {elapsed:.3f}s")
+    return result
+
+
+def main() -> None:
+    """Benchmark the different ways of counting visible trees against each other."""
+
+    print(f"Counting visible trees on a {GRID_SIZE}x{GRID_SIZE} grid:")
+    tree_heights = generate_tree_heights(GRID_SIZE, GRID_SIZE)
+
+    start = perf_counter()
+    visible_tree_count = count_visible_trees(tree_heights)
+    sequential_elapsed = perf_counter() - start
+    print(f"  Pure Python: {sequential_elapsed:.3f}s")
+
+    for worker_count in WORKER_COUNTS:
+        start = perf_counter()
+        parallel_visible_tree_count = count_visible_trees_in_parallel(
+            tree_heights,
+            worker_count,
+        )
+        elapsed = perf_counter() - start
+        speedup = sequential_elapsed / elapsed
+        print(f"  {worker_count} worker(s): {elapsed:.3f}s ({speedup:.2f}x)")
+
+        if parallel_visible_tree_count != visible_tree_count:
+            raise ValueError("The visibility counts do not match")
+
+    if np is None:
+        print("  NumPy is not installed, so the vectorized count was skipped.")
+        return
+
+    height_array = np.array(tree_heights, dtype=np.uint8)
+    vectorized_visible_tree_count = time_step(
+        "NumPy",
+        lambda: count_visible_trees_vectorized(height_array),
+    )
+
+    if vectorized_visible_tree_count != visible_tree_count:
+        raise ValueError("The visibility counts do not match")
+
+
+if __name__ == "__main__":
+    main()
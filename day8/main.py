@@ -4,9 +4,21 @@ Treetop Tree House
 https://adventofcode.com/2022/day/8
 """
 
-from collections.abc import Iterable
+import os
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
+from mmap import ACCESS_READ, mmap
+from multiprocessing.shared_memory import SharedMemory
 from os import path
-from typing import NamedTuple
+from types import TracebackType
+from typing import NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 INPUT_FILE = "input.txt"
 TEST_FILE = "test.txt"
@@ -14,6 +26,10 @@ TEST_FILE = "test.txt"
 MIN_HEIGHT = 0
 MAX_HEIGHT = 9
 
+DIGIT_OFFSET = ord("0")
+
+BANDS_PER_WORKER = 4
+
 
 class Position(NamedTuple):
     """Represents a position in a grid."""
@@ -23,6 +39,14 @@ class Position(NamedTuple):
 
 
 HeightGrid = list[list[int]]
+ScoreGrid = list[list[int]]
+
+
+class ScenicScores(NamedTuple):
+    """Represents the scenic scores of every tree in a grid."""
+
+    best_position: Position
+    scores: ScoreGrid
 
 
 def read_tree_heights(file_path: str) -> HeightGrid:
@@ -38,12 +62,116 @@ def parse_tree_heights(line: list[str]) -> list[int]:
     return [int(char) for char in line]
 
 
-def find_visible_trees(sequence: Iterable[int]) -> list[int]:
-    """Find the trees that are visible from outside the grid in a sequence."""
+class MappedHeightGrid:
+    """Represents a grid of tree heights mapped directly from the bytes of a file.
+
+    Rows and columns are views into the mapped file, so the grid is never copied.
+    The heights are the digit bytes themselves, offset from the true heights by the
+    value of the digit zero.
+    """
+
+    height_offset = DIGIT_OFFSET
+
+    def __init__(self, file_path: str) -> None:
+        """Map the grid of tree heights stored in a file."""
+
+        self.file_path = file_path
+
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self.data = mmap(file.fileno(), 0, access=ACCESS_READ)
+            else:
+                self.data = b""
+
+        self.view = memoryview(self.data)
+
+        # NOTE: Every line holds the same number of digits followed by a line break,
+        # so the start of each row is a fixed stride from the start of the last. The
+        # final line may be missing its line break.
+
+        line_break_index = self.data.find(b"\n")
+        if line_break_index == -1:
+            line_break_index = len(self.data)
+
+        self.col_count = line_break_index
+        if self.col_count and self.data[self.col_count - 1] == ord("\r"):
+            self.col_count -= 1
+
+        self.stride = line_break_index + 1
+        self.row_count = (len(self.data) + self.stride - self.col_count) // self.stride
+        if not self.col_count:
+            self.row_count = 0
+
+    def __enter__(self) -> "MappedHeightGrid":
+        """Use the grid as a context manager that closes it on exit."""
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Close the grid on leaving the context."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the grid from memory.
+
+        Any views of rows or columns must be released before the file can be
+        unmapped, and the grid cannot be used once it has been closed.
+        """
+
+        self.view.release()
+
+        if isinstance(self.data, mmap):
+            self.data.close()
+
+    def __len__(self) -> int:
+        """Count the rows of the grid."""
+
+        return self.row_count
+
+    def __getitem__(self, row: int) -> memoryview:
+        """Get a view of a row of the grid."""
+
+        if not 0 <= row < self.row_count:
+            raise IndexError(row)
+
+        start = row * self.stride
+        return self.view[start : start + self.col_count]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        """Iterate over views of the rows of the grid."""
+
+        return (self[row] for row in range(self.row_count))
+
+    def columns(self) -> Iterator[memoryview]:
+        """Iterate over views of the columns of the grid."""
+
+        end = (self.row_count - 1) * self.stride + 1
+        return (
+            self.view[col : col + end : self.stride] for col in range(self.col_count)
+        )
+
+
+def read_mapped_tree_heights(file_path: str) -> MappedHeightGrid:
+    """Map the heights of a grid of trees from a file without parsing them."""
+
+    return MappedHeightGrid(file_path)
+
+
+def find_visible_trees(sequence: Iterable[int], height_offset: int = 0) -> list[int]:
+    """Find the trees that are visible from outside the grid in a sequence.
+
+    The heights in the sequence may be offset from the true heights by a constant.
+    """
 
     visible = []
 
-    tallest_encountered_height = MIN_HEIGHT - 1
+    tallest_encountered_height = MIN_HEIGHT + height_offset - 1
     for index, height in enumerate(sequence):
         if height <= tallest_encountered_height:
             continue
@@ -51,32 +179,475 @@ def find_visible_trees(sequence: Iterable[int]) -> list[int]:
         visible.append(index)
         tallest_encountered_height = height
 
-        if height == MAX_HEIGHT:
+        if height == MAX_HEIGHT + height_offset:
             break
 
     return visible
 
 
-def count_visible_trees(tree_heights: HeightGrid) -> int:
+def create_visibility_bitmap(row_count: int, col_count: int) -> bytearray:
+    """Create an empty bitmap with one bit for every tree in a grid.
+
+    The bit for a tree is its index in the grid when read row by row, with the least
+    significant bit of each byte first.
+    """
+
+    return bytearray(-(-row_count * col_count // 8))
+
+
+def mark_visible(bitmap: bytearray, index: int) -> None:
+    """Mark the tree at the given index in a grid as visible in a bitmap."""
+
+    bitmap[index >> 3] |= 1 << (index & 7)
+
+
+def count_marked_trees(bitmap: bytearray) -> int:
+    """Count the number of trees marked in a bitmap."""
+
+    return int.from_bytes(bitmap, "little").bit_count()
+
+
+def find_visibility_bitmap(tree_heights: HeightGrid | MappedHeightGrid) -> bytearray:
+    """Find the trees that are visible from outside the grid as a packed bitmap."""
+
+    if isinstance(tree_heights, MappedHeightGrid):
+        columns_values = tree_heights.columns()
+        col_count = tree_heights.col_count
+        height_offset = tree_heights.height_offset
+    else:
+        columns_values = zip(*tree_heights)
+        col_count = len(tree_heights[0]) if tree_heights else 0
+        height_offset = 0
+
+    row_count = len(tree_heights)
+    visible = create_visibility_bitmap(row_count, col_count)
+
+    for row, row_values in enumerate(tree_heights):
+        row_start = row * col_count
+
+        for col in find_visible_trees(row_values, height_offset):
+            mark_visible(visible, row_start + col)
+
+        for col in find_visible_trees(reversed(row_values), height_offset):
+            mark_visible(visible, row_start + col_count - col - 1)
+
+    for col, col_values in enumerate(columns_values):
+        for row in find_visible_trees(col_values, height_offset):
+            mark_visible(visible, row * col_count + col)
+
+        for row in find_visible_trees(reversed(col_values), height_offset):
+            mark_visible(visible, (row_count - row - 1) * col_count + col)
+
+    return visible
+
+
+def count_visible_trees(tree_heights: HeightGrid | MappedHeightGrid) -> int:
     """Count the number of trees that are visible from outside the grid."""
 
-    visible = set()
+    return count_marked_trees(find_visibility_bitmap(tree_heights))
+
+
+def write_visibility_bitmap(bitmap: bytearray, file_path: str) -> None:
+    """Write a packed visibility bitmap to a file as raw bytes."""
+
+    with open(file_path, "wb") as file:
+        file.write(bitmap)
+
+
+class TreeGrid:
+    """Represents a grid of trees whose heights can change over time.
+
+    The tallest tree before and after every tree along its row and column is kept
+    up to date, so that changing the height of a tree only requires recomputing the
+    visibility of the trees sharing its row or column.
+    """
+
+    def __init__(self, tree_heights: HeightGrid) -> None:
+        """Create a new grid of trees with the given initial heights."""
+
+        self.heights = [list(row_values) for row_values in tree_heights]
+        self.row_count = len(self.heights)
+        self.col_count = len(self.heights[0]) if self.heights else 0
+
+        self.row_prefix_maxima: HeightGrid = [[] for _ in range(self.row_count)]
+        self.row_suffix_maxima: HeightGrid = [[] for _ in range(self.row_count)]
+        self.col_prefix_maxima: HeightGrid = [[] for _ in range(self.col_count)]
+        self.col_suffix_maxima: HeightGrid = [[] for _ in range(self.col_count)]
+
+        for row in range(self.row_count):
+            self._update_row_maxima(row)
+        for col in range(self.col_count):
+            self._update_col_maxima(col)
+
+        self.visible = bytearray(self.row_count * self.col_count)
+        self.visible_count = 0
+        for row in range(self.row_count):
+            for col in range(self.col_count):
+                self._update_visibility(row, col)
+
+    def set_height(self, position: Position, height: int) -> None:
+        """Change the height of the tree at the given position."""
+
+        if not MIN_HEIGHT <= height <= MAX_HEIGHT:
+            raise ValueError(f"Invalid height: {height}")
+
+        row, col = self._validate_position(position)
+        self.heights[row][col] = height
+
+        self._update_row_maxima(row)
+        self._update_col_maxima(col)
+
+        for other_col in range(self.col_count):
+            self._update_visibility(row, other_col)
+        for other_row in range(self.row_count):
+            self._update_visibility(other_row, col)
+
+    def is_visible(self, position: Position) -> bool:
+        """Check if the tree at the given position is visible from outside the grid."""
+
+        row, col = self._validate_position(position)
+        return bool(self.visible[row * self.col_count + col])
+
+    def _validate_position(self, position: Position) -> Position:
+        """Ensure that a position lies within the grid."""
+
+        row, col = position
+        if not (0 <= row < self.row_count and 0 <= col < self.col_count):
+            raise IndexError(position)
+
+        return position
+
+    def _update_row_maxima(self, row: int) -> None:
+        """Recompute the tallest trees seen so far along a row in both directions."""
+
+        row_values = self.heights[row]
+        self.row_prefix_maxima[row] = list(accumulate(row_values, max))
+        self.row_suffix_maxima[row] = list(accumulate(reversed(row_values), max))[::-1]
+
+    def _update_col_maxima(self, col: int) -> None:
+        """Recompute the tallest trees seen so far along a column in both directions."""
+
+        col_values = [row_values[col] for row_values in self.heights]
+        self.col_prefix_maxima[col] = list(accumulate(col_values, max))
+        self.col_suffix_maxima[col] = list(accumulate(reversed(col_values), max))[::-1]
+
+    def _update_visibility(self, row: int, col: int) -> None:
+        """Recompute whether the tree at the given position is visible."""
+
+        height = self.heights[row][col]
+        row_prefix_maxima = self.row_prefix_maxima[row]
+        row_suffix_maxima = self.row_suffix_maxima[row]
+        col_prefix_maxima = self.col_prefix_maxima[col]
+        col_suffix_maxima = self.col_suffix_maxima[col]
+
+        is_visible = (
+            col == 0
+            or col == self.col_count - 1
+            or row == 0
+            or row == self.row_count - 1
+            or height > row_prefix_maxima[col - 1]
+            or height > row_suffix_maxima[col + 1]
+            or height > col_prefix_maxima[row - 1]
+            or height > col_suffix_maxima[row + 1]
+        )
+
+        index = row * self.col_count + col
+        self.visible_count += is_visible - self.visible[index]
+        self.visible[index] = is_visible
+
+
+class SharedGridLayout(NamedTuple):
+    """Describes where a grid of tree heights is stored so other processes can map it.
+
+    The grid is stored either in a named block of shared memory or in a file.
+    """
+
+    name: str
+    is_file: bool
+    row_count: int
+    col_count: int
+    stride: int
+    height_offset: int
+
+
+class GridBand(NamedTuple):
+    """Represents a contiguous band of rows or columns of a grid."""
+
+    is_row_band: bool
+    start: int
+    stop: int
+
+
+def find_visible_trees_in_band(layout: SharedGridLayout, band: GridBand) -> array:
+    """Find the trees in a band of a shared grid that are visible from its edges.
+
+    The trees are identified by their index in the grid when read row by row.
+    """
+
+    if layout.is_file:
+        with open(layout.name, "rb") as file:
+            storage = mmap(file.fileno(), 0, access=ACCESS_READ)
+    else:
+        storage = SharedMemory(name=layout.name)
+
+    visible = array("q")
+    row_count, col_count, stride = layout.row_count, layout.col_count, layout.stride
+
+    try:
+        with memoryview(storage if layout.is_file else storage.buf) as view:
+            for line in range(band.start, band.stop):
+                if band.is_row_band:
+                    start = line * stride
+                    values = view[start : start + col_count]
+                    first_index, index_step = line * col_count, 1
+                else:
+                    values = view[line : line + (row_count - 1) * stride + 1 : stride]
+                    first_index, index_step = line, col_count
+
+                last_index = first_index + (len(values) - 1) * index_step
+
+                for position in find_visible_trees(values, layout.height_offset):
+                    visible.append(first_index + position * index_step)
+
+                for position in find_visible_trees(
+                    reversed(values),
+                    layout.height_offset,
+                ):
+                    visible.append(last_index - position * index_step)
+
+                values.release()
+    finally:
+        storage.close()
+
+    return visible
+
+
+def split_into_bands(
+    line_count: int,
+    band_count: int,
+    is_row_band: bool,
+) -> list[GridBand]:
+    """Split the lines of a grid into bands of roughly equal size."""
+
+    band_size = max(1, -(-line_count // band_count))
+    return [
+        GridBand(is_row_band, start, min(start + band_size, line_count))
+        for start in range(0, line_count, band_size)
+    ]
+
+
+def count_visible_trees_in_parallel(
+    tree_heights: HeightGrid | MappedHeightGrid,
+    max_workers: Optional[int] = None,
+) -> int:
+    """Count the number of trees that are visible from outside the grid in parallel.
+
+    The grid is split into bands of rows and bands of columns which are scanned by
+    a pool of processes, all reading the same copy of the grid.
+    """
+
+    # NOTE: A mapped grid is already shared through the file it is mapped from, so
+    # only a grid held in lists needs to be copied into shared memory.
+
+    shared_memory = None
+    if isinstance(tree_heights, MappedHeightGrid):
+        layout = SharedGridLayout(
+            tree_heights.file_path,
+            True,
+            tree_heights.row_count,
+            tree_heights.col_count,
+            tree_heights.stride,
+            tree_heights.height_offset,
+        )
+    else:
+        row_count = len(tree_heights)
+        col_count = len(tree_heights[0]) if tree_heights else 0
+        shared_memory = SharedMemory(create=True, size=max(1, row_count * col_count))
+        for row, row_values in enumerate(tree_heights):
+            start = row * col_count
+            shared_memory.buf[start : start + col_count] = bytes(row_values)
+        layout = SharedGridLayout(
+            shared_memory.name,
+            False,
+            row_count,
+            col_count,
+            col_count,
+            0,
+        )
+
+    worker_count = max_workers or os.cpu_count() or 1
+    band_count = worker_count * BANDS_PER_WORKER
+    bands = [
+        *split_into_bands(layout.row_count, band_count, True),
+        *split_into_bands(layout.col_count, band_count, False),
+    ]
+
+    # NOTE: Each band reports the trees it found visible, and marking them all in a
+    # single bitmap merges the bands, since a tree is visible if any band saw it.
+    # A scan sees at most one tree of each height, so the results stay small and
+    # independent of the size of the grid, unlike a bitmap of the whole grid.
+
+    visible = create_visibility_bitmap(layout.row_count, layout.col_count)
+
+    try:
+        with ProcessPoolExecutor(max_workers=worker_count) as executor:
+            band_results = executor.map(
+                find_visible_trees_in_band,
+                repeat(layout),
+                bands,
+            )
+            for indices in band_results:
+                for index in indices:
+                    mark_visible(visible, index)
+    finally:
+        if shared_memory:
+            shared_memory.close()
+            shared_memory.unlink()
+
+    return count_marked_trees(visible)
+
+
+def find_viewing_distances(sequence: Sequence[int]) -> list[int]:
+    """Find how far back each tree in a sequence can see before its view is blocked.
+
+    A tree's view is blocked by the first tree at least as tall as itself.
+    """
+
+    # NOTE: The stack holds the indices of the trees that could still block the
+    # view of a later tree. Their heights are non-increasing from bottom to top,
+    # since trees of equal height stay on the stack, and any tree shorter than the
+    # current one can never block a later view again.
+
+    distances = []
+    blocking_trees: list[int] = []
+
+    for index, height in enumerate(sequence):
+        while blocking_trees and sequence[blocking_trees[-1]] < height:
+            blocking_trees.pop()
+
+        distances.append(index - blocking_trees[-1] if blocking_trees else index)
+
+        # NOTE: Nothing can see past a tree of the maximum height, so the trees
+        # before it can never block a later view.
+
+        if height == MAX_HEIGHT:
+            blocking_trees.clear()
+
+        blocking_trees.append(index)
+
+    return distances
+
+
+def compute_scenic_scores(tree_heights: HeightGrid) -> ScenicScores:
+    """Compute the scenic score of every tree and find the most scenic position.
+
+    The scenic score of a tree is the product of its viewing distances in all four
+    directions.
+    """
+
+    scores = [[1] * len(row_values) for row_values in tree_heights]
 
     for row, row_values in enumerate(tree_heights):
-        columns = find_visible_trees(row_values)
-        visible.update((row, col) for col in columns)
+        distances_left = find_viewing_distances(row_values)
+        distances_right = find_viewing_distances(row_values[::-1])[::-1]
 
-        columns = find_visible_trees(reversed(row_values))
-        visible.update((row, len(row_values) - col - 1) for col in columns)
+        for col, (left, right) in enumerate(zip(distances_left, distances_right)):
+            scores[row][col] *= left * right
 
     for col, col_values in enumerate(zip(*tree_heights)):
-        rows = find_visible_trees(col_values)
-        visible.update((row, col) for row in rows)
+        distances_up = find_viewing_distances(col_values)
+        distances_down = find_viewing_distances(col_values[::-1])[::-1]
+
+        for row, (up, down) in enumerate(zip(distances_up, distances_down)):
+            scores[row][col] *= up * down
+
+    best_position = max(
+        (
+            Position(row, col)
+            for row, row_values in enumerate(scores)
+            for col in range(len(row_values))
+        ),
+        key=lambda position: scores[position.row][position.col],
+    )
+
+    return ScenicScores(best_position, scores)
+
+
+def require_numpy() -> None:
+    """Ensure that NumPy is available for the vectorized functions."""
+
+    if np is None:
+        raise ModuleNotFoundError("NumPy is required for the vectorized functions")
+
+
+def read_tree_height_array(file_path: str) -> "np.ndarray":
+    """Read the heights of a grid of trees from a file as a NumPy array."""
+
+    require_numpy()
+
+    data = np.fromfile(file_path, dtype=np.uint8)
+    if not data.size:
+        return np.empty((0, 0), dtype=np.uint8)
 
-        rows = find_visible_trees(reversed(col_values))
-        visible.update((len(col_values) - row - 1, col) for row in rows)
+    # NOTE: Every line holds the same number of digits followed by a line break,
+    # which may include a carriage return. The final line may be missing its line
+    # break, so we add the same line break as the other lines to make them even.
 
-    return len(visible)
+    newline_positions = np.flatnonzero(data == ord("\n"))
+    line_end = int(newline_positions[0]) if newline_positions.size else data.size
+
+    width = line_end
+    if width and data[width - 1] == ord("\r"):
+        width -= 1
+
+    if data[-1] != ord("\n"):
+        line_break = np.append(data[width:line_end], np.uint8(ord("\n")))
+        data = np.append(data, line_break)
+
+    lines = data.reshape(-1, line_end + 1)
+    heights = lines[:, :width] - np.uint8(DIGIT_OFFSET)
+
+    if (heights > MAX_HEIGHT).any():
+        raise ValueError(f"Invalid tree heights: {file_path}")
+
+    return heights
+
+
+def find_visible_tree_mask(tree_heights: "np.ndarray") -> "np.ndarray":
+    """Find the trees that are visible from outside the grid as a boolean mask."""
+
+    require_numpy()
+
+    visible = np.zeros(tree_heights.shape, dtype=bool)
+    if not tree_heights.size:
+        return visible
+
+    # NOTE: Looking from each side of the grid is the same as looking from the left
+    # of a flipped or transposed view of it. Since those views share memory with the
+    # original arrays, marking the view of the mask marks the mask itself.
+
+    views = (
+        (tree_heights, visible),
+        (tree_heights[:, ::-1], visible[:, ::-1]),
+        (tree_heights.T, visible.T),
+        (tree_heights.T[:, ::-1], visible.T[:, ::-1]),
+    )
+
+    for heights, visible_from_left in views:
+        tallest_so_far = np.maximum.accumulate(heights, axis=1)
+        visible_from_left[:, 0] = True
+        visible_from_left[:, 1:] |= heights[:, 1:] > tallest_so_far[:, :-1]
+
+    return visible
+
+
+def count_visible_trees_vectorized(tree_heights: "HeightGrid | np.ndarray") -> int:
+    """Count the number of trees that are visible from outside the grid with NumPy."""
+
+    require_numpy()
+
+    height_array = np.asarray(tree_heights, dtype=np.uint8)
+    return int(np.count_nonzero(find_visible_tree_mask(height_array)))
 
 
 def main() -> None:
@@ -91,6 +662,10 @@ def main() -> None:
     visible_tree_count = count_visible_trees(tree_heights)
     print(f"{visible_tree_count} trees are visible from outside the grid.")
 
+    best_position, scenic_scores = compute_scenic_scores(tree_heights)
+    best_scenic_score = scenic_scores[best_position.row][best_position.col]
+    print(f"The highest scenic score is {best_scenic_score} at {best_position}.")
+
 
 if __name__ == "__main__":
     main()